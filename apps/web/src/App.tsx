@@ -12,6 +12,7 @@ type JobStatus = {
   step?: string
   progress?: number
   message?: string
+  branches?: Record<string, { step?: string; progress?: number; message?: string }>
   artifact_urls?: {
     preview?: string
     final?: string
@@ -92,7 +93,7 @@ function App() {
   const [vhsIntensity, setVhsIntensity] = useState(0.7)
   const [glitchAmount, setGlitchAmount] = useState(0.2)
   const [includeClipAudio, setIncludeClipAudio] = useState(false)
-  const [songSection, setSongSection] = useState<'auto_energy' | 'manual'>('auto_energy')
+  const [songSection, setSongSection] = useState<'auto_energy' | 'auto_score' | 'manual'>('auto_energy')
   const [songStartInput, setSongStartInput] = useState('00:45')
   const [songSnap, setSongSnap] = useState<'downbeat' | 'beat' | 'none'>('downbeat')
   const [resolution, setResolution] = useState<'1080x1920' | '1280x960' | '1360x1824'>(
@@ -352,6 +353,18 @@ function App() {
   useEffect(() => {
     if (!jobId) return
     let active = true
+    let interval: number | null = null
+    let source: EventSource | null = null
+
+    const applyStatus = (data: JobStatus) => {
+      setJobStatus(data)
+      if (data.artifact_urls?.preview) {
+        setPreviewUrl(`${API_BASE}${data.artifact_urls.preview}`)
+      }
+      if (data.artifact_urls?.final) {
+        setFinalUrl(`${API_BASE}${data.artifact_urls.final}`)
+      }
+    }
 
     const poll = async () => {
       try {
@@ -359,13 +372,7 @@ function App() {
         if (!response.ok) return
         const data = (await response.json()) as JobStatus
         if (!active) return
-        setJobStatus(data)
-        if (data.artifact_urls?.preview) {
-          setPreviewUrl(`${API_BASE}${data.artifact_urls.preview}`)
-        }
-        if (data.artifact_urls?.final) {
-          setFinalUrl(`${API_BASE}${data.artifact_urls.final}`)
-        }
+        applyStatus(data)
       } catch {
         if (active) {
           setError('Failed to fetch job status')
@@ -373,11 +380,40 @@ function App() {
       }
     }
 
-    void poll()
-    const interval = window.setInterval(poll, 2000)
+    const startPolling = () => {
+      if (interval !== null) return
+      void poll()
+      interval = window.setInterval(poll, 2000)
+    }
+
+    if (typeof EventSource === 'undefined') {
+      startPolling()
+    } else {
+      source = new EventSource(`${API_BASE}/jobs/${jobId}/events`)
+      source.addEventListener('status', (event) => {
+        if (!active) return
+        const data = JSON.parse((event as MessageEvent).data) as JobStatus
+        applyStatus(data)
+        if (data.status === 'complete' || data.status === 'error') {
+          source?.close()
+        }
+      })
+      source.addEventListener('artifact', (event) => {
+        if (!active) return
+        const data = JSON.parse((event as MessageEvent).data) as { name: string; url: string }
+        if (data.name === 'preview') setPreviewUrl(`${API_BASE}${data.url}`)
+        if (data.name === 'final') setFinalUrl(`${API_BASE}${data.url}`)
+      })
+      source.onerror = () => {
+        // Closed streams (finished jobs, proxies without streaming) fall back to polling.
+        if (source?.readyState === EventSource.CLOSED) startPolling()
+      }
+    }
+
     return () => {
       active = false
-      window.clearInterval(interval)
+      source?.close()
+      if (interval !== null) window.clearInterval(interval)
     }
   }, [jobId])
 
@@ -662,6 +698,12 @@ function App() {
               >
                 Auto (best part)
               </button>
+              <button
+                className={songSection === 'auto_score' ? 'active' : ''}
+                onClick={() => setSongSection('auto_score')}
+              >
+                Auto (energy + beats)
+              </button>
               <button
                 className={songSection === 'manual' ? 'active' : ''}
                 onClick={() => setSongSection('manual')}
@@ -795,6 +837,13 @@ function App() {
             <strong>Message</strong>
             <span>{jobStatus?.message ?? '-'}</span>
           </div>
+          {jobStatus?.status === 'running' &&
+            Object.entries(jobStatus.branches ?? {}).map(([name, branch]) => (
+              <div key={name}>
+                <strong>{name}</strong>
+                <span>{branch.message ?? branch.step ?? '-'}</span>
+              </div>
+            ))}
         </div>
         <div className="preview">
           {previewUrl ? (
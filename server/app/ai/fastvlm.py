@@ -1,47 +1,216 @@
+import hashlib
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 from PIL import Image, ImageStat
 
-try:
-    import torch
-    from transformers import pipeline
-except Exception:  # pragma: no cover - optional deps
-    torch = None
-    pipeline = None
+from app.utils.concurrency import cpu_count, env_int
+from app.utils.paths import CACHE_DIR
 
+MODEL_CACHE_DIR = CACHE_DIR / "models"
 
 _MODEL = None
+# torch and transformers take seconds to import, so they load on first use
+# rather than with this module (which the API process imports).
+_ML: Optional[Tuple[Any, Any]] = None
+
+
+def _ml_modules() -> Tuple[Any, Any]:
+    global _ML
+    if _ML is None:
+        try:
+            import torch
+            import transformers
+        except Exception:  # pragma: no cover - optional deps
+            torch = None
+            transformers = None
+        _ML = (torch, transformers)
+    return _ML
+
+
+FrameInput = Union[Path, Image.Image, np.ndarray]
+
+
+def model_name() -> str:
+    return os.getenv("FASTVLM_MODEL", "Salesforce/blip-image-captioning-base")
+
+
+def batch_size() -> int:
+    return env_int("FASTVLM_BATCH_SIZE", 8)
+
+
+def torch_threads() -> int:
+    return env_int("FASTVLM_THREADS", cpu_count())
+
+
+def interop_threads() -> Optional[int]:
+    if not os.getenv("FASTVLM_INTEROP_THREADS"):
+        return None
+    return env_int("FASTVLM_INTEROP_THREADS", 1)
+
+
+def quantize_mode() -> str:
+    """`int8` applies dynamic int8 quantization to the model's Linear layers on CPU."""
+    mode = os.getenv("FASTVLM_QUANTIZE", "").lower()
+    return mode if mode == "int8" else ""
+
+
+# Pre-filter thresholds, measured on a 128x128 grayscale copy of each frame.
+STATS_SIZE = 128
+MIN_BRIGHTNESS = 0.06
+MIN_SHARPNESS = 15.0
+MAX_DUPLICATE_MOTION = 0.04
+
+
+def prefilter_enabled() -> bool:
+    return os.getenv("FASTVLM_PREFILTER", "1").lower() not in {"0", "false", "no"}
+
+
+def duplicate_distance() -> int:
+    return env_int("FASTVLM_DUPLICATE_DISTANCE", 6, minimum=0)
+
+
+def labeler_config() -> Dict[str, Any]:
+    """Everything besides the frames that decides what labels come out."""
+    config: Dict[str, Any] = {"model": model_name(), "prefilter": prefilter_enabled()}
+    if quantize_mode():
+        config["quantize"] = quantize_mode()
+    if config["prefilter"]:
+        config.update(
+            min_brightness=MIN_BRIGHTNESS,
+            min_sharpness=MIN_SHARPNESS,
+            max_motion=MAX_DUPLICATE_MOTION,
+            duplicate_distance=duplicate_distance(),
+        )
+    return config
+
+
+def _quantized_path() -> Path:
+    torch, transformers = _ml_modules()
+    versions = f"{model_name()}|{torch.__version__}|{transformers.__version__}"
+    digest = hashlib.sha1(versions.encode()).hexdigest()[:16]
+    return MODEL_CACHE_DIR / f"{digest}-int8.pt"
+
+
+def _quantized_pipeline():
+    """Int8 captioning pipeline, built once and then loaded from MODEL_CACHE_DIR."""
+    torch, transformers = _ml_modules()
+    path = _quantized_path()
+    if path.exists():
+        try:
+            model = torch.load(path, weights_only=False)
+            return transformers.pipeline(
+                "image-to-text",
+                model=model,
+                tokenizer=transformers.AutoTokenizer.from_pretrained(model_name()),
+                image_processor=transformers.AutoImageProcessor.from_pretrained(model_name()),
+                device=-1,
+            )
+        except Exception:
+            path.unlink(missing_ok=True)
+
+    captioner = transformers.pipeline("image-to-text", model=model_name(), device=-1)
+    captioner.model = torch.quantization.quantize_dynamic(
+        captioner.model.eval(), {torch.nn.Linear}, dtype=torch.qint8
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        torch.save(captioner.model, temp_path)
+        temp_path.replace(path)
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+    return captioner
 
 
 def _load_model():
     global _MODEL
     if _MODEL is not None:
         return _MODEL
-    if pipeline is None:
+    torch, transformers = _ml_modules()
+    if transformers is None:
         return None
-    model_name = os.getenv("FASTVLM_MODEL", "Salesforce/blip-image-captioning-base")
     device = -1
     if torch is not None and torch.cuda.is_available():
         device = 0
-    _MODEL = pipeline("image-to-text", model=model_name, device=device)
+    if torch is not None:
+        torch.set_num_threads(torch_threads())
+        if interop_threads():
+            try:
+                torch.set_num_interop_threads(interop_threads())
+            except RuntimeError:
+                # Only settable before the first parallel op in this process.
+                pass
+    if device == -1 and quantize_mode() == "int8":
+        _MODEL = _quantized_pipeline()
+    else:
+        _MODEL = transformers.pipeline("image-to-text", model=model_name(), device=device)
     return _MODEL
 
 
-def _caption_image(image: Image.Image) -> str:
-    model = _load_model()
-    if model is None:
-        return ""
+def warmup_enabled() -> bool:
+    return os.getenv("FASTVLM_WARMUP", "0").lower() in {"1", "true", "yes"}
+
+
+def warm_up() -> bool:
+    """Load the model and caption one blank frame so the first job does not pay for it."""
     try:
-        result = model(image, max_new_tokens=32)
-        if isinstance(result, list) and result:
-            return result[0].get("generated_text", "")
+        if _load_model() is None:
+            return False
+        caption_local([Image.new("RGB", (384, 384))])
     except Exception:
-        return ""
+        return False
+    return True
+
+
+def _generated_text(result: Any) -> str:
+    if isinstance(result, list) and result:
+        result = result[0]
+    if isinstance(result, dict):
+        return result.get("generated_text", "")
     return ""
 
 
+def local_fallback_enabled() -> bool:
+    return os.getenv("INFERENCE_LOCAL_FALLBACK", "0").lower() in {"1", "true", "yes"}
+
+
+def caption_local(images: Sequence[Image.Image], size: Optional[int] = None) -> List[str]:
+    """Caption with this process's own model."""
+    model = _load_model()
+    if model is None or not images:
+        return [""] * len(images)
+    try:
+        results = model(list(images), batch_size=size or len(images), max_new_tokens=32)
+    except Exception:
+        return [""] * len(images)
+    captions = [_generated_text(result) for result in results]
+    if len(captions) != len(images):
+        return [""] * len(images)
+    return captions
+
+
+def _caption_images(images: Sequence[Image.Image]) -> List[str]:
+    if not images:
+        return []
+    # Workers share one model through the inference service when it is configured.
+    from app.ai.service import InferenceUnavailable, caption_remote
+
+    try:
+        captions = caption_remote(images)
+    except InferenceUnavailable:
+        # Loading a private copy of the weights per worker is opt-in only.
+        if not local_fallback_enabled():
+            raise
+        captions = None
+    if captions is not None:
+        return captions
+    return caption_local(images)
+
+
 def _brightness(image: Image.Image) -> float:
     grayscale = image.convert("L")
     stat = ImageStat.Stat(grayscale)
@@ -117,9 +286,7 @@ def _highlight_score(energy: int, tags: List[str], people: int) -> int:
     return max(0, min(10, score))
 
 
-def tag_frame(image_path: Path) -> Dict[str, Any]:
-    image = Image.open(image_path).convert("RGB")
-    caption = _caption_image(image)
+def _label(image: Image.Image, caption: str) -> Dict[str, Any]:
     brightness = _brightness(image)
     tags = _extract_tags(caption)
     people = _people_score(caption, tags)
@@ -135,3 +302,142 @@ def tag_frame(image_path: Path) -> Dict[str, Any]:
         "brightness": round(brightness, 3),
         "ai_used": bool(caption),
     }
+
+
+def _open_frame(frame: FrameInput) -> Image.Image:
+    if isinstance(frame, np.ndarray):
+        return Image.fromarray(frame, "RGB")
+    if isinstance(frame, Image.Image):
+        return frame.convert("RGB")
+    with Image.open(frame) as image:
+        return image.convert("RGB")
+
+
+def frame_stats(images: Sequence[Image.Image]) -> Dict[str, np.ndarray]:
+    """Brightness, sharpness and a 64-bit difference hash for a batch of frames.
+
+    Frames are reduced to 128x128 grayscale and stacked, so every measure is one
+    vectorized pass over the batch. `small` is kept for frame differencing.
+    """
+    size = (STATS_SIZE, STATS_SIZE)
+    small = np.stack(
+        [np.asarray(image.convert("L").resize(size, Image.BILINEAR), dtype=np.float32) for image in images]
+    )
+    laplacian = (
+        4 * small[:, 1:-1, 1:-1]
+        - small[:, :-2, 1:-1]
+        - small[:, 2:, 1:-1]
+        - small[:, 1:-1, :-2]
+        - small[:, 1:-1, 2:]
+    )
+    # 8x9 block means -> 8x8 horizontal gradient signs (dHash).
+    blocks = small[:, :, :126].reshape(len(images), 8, 16, 9, 14).mean(axis=(2, 4))
+    bits = blocks[:, :, 1:] > blocks[:, :, :-1]
+    return {
+        "small": small,
+        "brightness": small.mean(axis=(1, 2)) / 255.0,
+        "sharpness": laplacian.var(axis=(1, 2)),
+        "hash": np.packbits(bits.reshape(len(images), 64), axis=1),
+    }
+
+
+class _ClipState:
+    __slots__ = ("previous", "ref_hash", "ref_caption", "ref_index")
+
+    def __init__(self) -> None:
+        self.previous: Optional[np.ndarray] = None
+        self.ref_hash: Optional[np.ndarray] = None
+        self.ref_caption = ""
+        # Index into the current batch while the reference frame awaits its caption.
+        self.ref_index: Optional[int] = None
+
+
+def _plan_batch(
+    images: Sequence[Image.Image],
+    keys: Sequence[Hashable],
+    states: Dict[Hashable, _ClipState],
+) -> List[Tuple[str, Any]]:
+    """Decide per frame: ("caption", None), ("reuse", batch index or caption), or (reason, "")."""
+    stats = frame_stats(images)
+    max_distance = duplicate_distance()
+    plan: List[Tuple[str, Any]] = []
+    for index, key in enumerate(keys):
+        state = states.setdefault(key, _ClipState())
+        small = stats["small"][index]
+        motion = 1.0 if state.previous is None else float(np.abs(small - state.previous).mean()) / 255.0
+        state.previous = small
+
+        if stats["brightness"][index] < MIN_BRIGHTNESS:
+            plan.append(("dark", ""))
+            continue
+        if stats["sharpness"][index] < MIN_SHARPNESS:
+            plan.append(("blur", ""))
+            continue
+        if state.ref_hash is not None and motion < MAX_DUPLICATE_MOTION:
+            distance = int(np.unpackbits(state.ref_hash ^ stats["hash"][index]).sum())
+            if distance <= max_distance:
+                reference = state.ref_index if state.ref_index is not None else state.ref_caption
+                plan.append(("duplicate", reference))
+                continue
+        state.ref_hash = stats["hash"][index]
+        state.ref_index = index
+        plan.append(("caption", None))
+    return plan
+
+
+def tag_frames(
+    frames: Iterable[FrameInput],
+    size: Optional[int] = None,
+    on_label: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+    clip_of: Optional[Callable[[int], Hashable]] = None,
+) -> List[Dict[str, Any]]:
+    """Label frames, captioning them `size` at a time (FASTVLM_BATCH_SIZE).
+
+    `frames` is consumed lazily, one batch at a time, so it can be a decoder
+    stream. `on_label(index, label)` fires for each frame as its batch finishes.
+    Unless FASTVLM_PREFILTER=0, dark and blurry frames get heuristic labels and
+    near-duplicates of the clip's last captioned frame reuse its caption; they
+    are marked with a `prefilter` reason. `clip_of(index)` names the clip a frame
+    belongs to, so interleaved clips are compared against their own history.
+    """
+    size = max(1, size or batch_size())
+    use_prefilter = prefilter_enabled()
+    states: Dict[Hashable, _ClipState] = {}
+    labels: List[Dict[str, Any]] = []
+    source = iter(frames)
+    while True:
+        images = [_open_frame(frame) for frame in islice(source, size)]
+        if not images:
+            break
+        offset = len(labels)
+        if use_prefilter:
+            keys = [clip_of(offset + index) if clip_of else None for index in range(len(images))]
+            plan = _plan_batch(images, keys, states)
+        else:
+            plan = [("caption", None)] * len(images)
+
+        selected = [index for index, (action, _) in enumerate(plan) if action == "caption"]
+        captions = dict(zip(selected, _caption_images([images[index] for index in selected])))
+        for state in states.values():
+            if state.ref_index is not None:
+                state.ref_caption = captions.get(state.ref_index, "")
+                state.ref_index = None
+
+        for index, (image, (action, detail)) in enumerate(zip(images, plan)):
+            if action == "caption":
+                caption = captions[index]
+            elif action == "duplicate":
+                caption = captions.get(detail, "") if isinstance(detail, int) else detail
+            else:
+                caption = ""
+            label = _label(image, caption)
+            if action != "caption":
+                label["prefilter"] = action
+            if on_label:
+                on_label(len(labels), label)
+            labels.append(label)
+    return labels
+
+
+def tag_frame(image_path: Path) -> Dict[str, Any]:
+    return tag_frames([image_path], size=1)[0]
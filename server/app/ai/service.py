@@ -0,0 +1,259 @@
+"""Shared captioning service.
+
+One process owns the captioning model and serves every job worker over a local
+socket, so the weights are loaded once and frames from concurrent jobs are
+coalesced into larger batches. The worker pool starts it by default
+(`INFERENCE_SERVICE=1`); a standalone one runs with
+
+    INFERENCE_AUTHKEY=<hex> python -m app.ai.service --address /tmp/moments-vlm.sock
+
+and workers find it through `INFERENCE_ADDRESS` / `INFERENCE_AUTHKEY`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from app.utils.concurrency import env_int
+from app.utils.paths import CACHE_DIR
+
+
+def service_enabled() -> bool:
+    return os.getenv("INFERENCE_SERVICE", "1").lower() not in {"0", "false", "no"}
+
+
+def default_address() -> str:
+    return str(CACHE_DIR / f"inference-{os.getpid()}.sock")
+
+
+def _parse_address(address: str) -> Any:
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit() and "/" not in address:
+        return (host, int(port))
+    return address
+
+
+def max_batch() -> int:
+    from app.ai.fastvlm import batch_size
+
+    return env_int("INFERENCE_MAX_BATCH", 2 * batch_size())
+
+
+class _Request:
+    __slots__ = ("images", "captions", "done")
+
+    def __init__(self, images: list[Image.Image]) -> None:
+        self.images = images
+        self.captions: list[str] = []
+        self.done = threading.Event()
+
+
+class _Batcher:
+    """Coalesces caption requests from all connections into model batches."""
+
+    def __init__(self, wait_s: float) -> None:
+        self.wait_s = wait_s
+        self._pending: deque[_Request] = deque()
+        self._ready = threading.Condition()
+
+    def submit(self, images: list[Image.Image]) -> list[str]:
+        request = _Request(images)
+        with self._ready:
+            self._pending.append(request)
+            self._ready.notify()
+        request.done.wait()
+        return request.captions
+
+    def _take(self) -> list[_Request]:
+        limit = max_batch()
+        with self._ready:
+            while not self._pending:
+                self._ready.wait()
+            batch = [self._pending.popleft()]
+            count = len(batch[0].images)
+            # Give other jobs a moment to join a batch that is not full yet.
+            deadline = time.monotonic() + self.wait_s
+            while count < limit:
+                if not self._pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._ready.wait(remaining):
+                        break
+                    continue
+                if count + len(self._pending[0].images) > limit:
+                    break
+                request = self._pending.popleft()
+                batch.append(request)
+                count += len(request.images)
+            return batch
+
+    def run(self) -> None:
+        from app.ai.fastvlm import caption_local
+
+        while True:
+            batch = self._take()
+            images = [image for request in batch for image in request.images]
+            try:
+                captions = caption_local(images, size=max_batch())
+            except Exception:
+                captions = [""] * len(images)
+            offset = 0
+            for request in batch:
+                request.captions = captions[offset : offset + len(request.images)]
+                offset += len(request.images)
+                request.done.set()
+
+
+def _serve_connection(conn: Connection, batcher: _Batcher) -> None:
+    with conn:
+        while True:
+            try:
+                op, payload = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if op == "caption":
+                    images = [Image.fromarray(frame, "RGB") for frame in payload]
+                    conn.send(("ok", batcher.submit(images)))
+                elif op == "ping":
+                    from app.ai.fastvlm import model_name
+
+                    conn.send(("ok", model_name()))
+                else:
+                    conn.send(("error", f"Unknown op: {op}"))
+            except (EOFError, OSError):
+                return
+            except Exception as exc:
+                conn.send(("error", str(exc)))
+
+
+def serve(address: str, authkey: bytes, stop_event: Any = None) -> None:
+    """Load the model and answer caption requests until `stop_event` is set."""
+    from app.ai.fastvlm import warm_up
+
+    target = _parse_address(address)
+    if isinstance(target, str):
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        if os.path.exists(target):
+            os.unlink(target)
+    listener = Listener(target, authkey=authkey)
+    # Clients that connect meanwhile simply wait for the first accept.
+    warm_up()
+
+    batcher = _Batcher(env_int("INFERENCE_BATCH_WAIT_MS", 20, minimum=0) / 1000.0)
+    threading.Thread(target=batcher.run, name="inference-batcher", daemon=True).start()
+
+    def _accept() -> None:
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                if stop_event is not None and stop_event.is_set():
+                    return
+                continue
+            threading.Thread(
+                target=_serve_connection, args=(conn, batcher), name="inference-conn", daemon=True
+            ).start()
+
+    threading.Thread(target=_accept, name="inference-accept", daemon=True).start()
+    try:
+        # Polled rather than waited on: a service killed inside
+        # stop_event.wait() would make the pool's stop_event.set() hang.
+        while stop_event is None or not stop_event.is_set():
+            time.sleep(1.0)
+    finally:
+        listener.close()
+        if isinstance(target, str) and os.path.exists(target):
+            os.unlink(target)
+
+
+def run_service(address: str, authkey_hex: str, stop_event: Any) -> None:
+    """Process entry point for the worker pool's service."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    serve(address, bytes.fromhex(authkey_hex), stop_event)
+
+
+_CLIENT = threading.local()
+
+
+class InferenceUnavailable(RuntimeError):
+    """The configured inference service could not be reached."""
+
+
+def service_configured() -> bool:
+    return bool(os.getenv("INFERENCE_ADDRESS") and os.getenv("INFERENCE_AUTHKEY"))
+
+
+def _connection() -> Connection:
+    conn = getattr(_CLIENT, "conn", None)
+    if conn is None:
+        address = os.environ["INFERENCE_ADDRESS"]
+        authkey = bytes.fromhex(os.environ["INFERENCE_AUTHKEY"])
+        conn = Client(_parse_address(address), authkey=authkey)
+        _CLIENT.conn = conn
+    return conn
+
+
+def caption_remote(images: Sequence[Image.Image]) -> Optional[list[str]]:
+    """Caption through the shared service; None when no service is configured.
+
+    A configured service that is briefly unreachable (starting up, restarting)
+    is retried with backoff for up to `INFERENCE_CONNECT_TIMEOUT_S`; after that
+    InferenceUnavailable is raised rather than loading a model in this process.
+    """
+    if not service_configured():
+        return None
+    frames = [np.asarray(image.convert("RGB")) for image in images]
+    deadline = time.monotonic() + env_int("INFERENCE_CONNECT_TIMEOUT_S", 30, minimum=0)
+    delay = 0.1
+    while True:
+        try:
+            conn = _connection()
+            conn.send(("caption", frames))
+            status, payload = conn.recv()
+            break
+        except (OSError, EOFError, AuthenticationError) as exc:
+            _CLIENT.conn = None
+            if time.monotonic() + delay > deadline:
+                raise InferenceUnavailable(f"Inference service unreachable: {exc}") from exc
+            time.sleep(delay)
+            delay = min(2.0, delay * 2)
+    if status != "ok":
+        raise RuntimeError(f"Inference service error: {payload}")
+    if len(payload) != len(images):
+        raise RuntimeError("Inference service returned the wrong number of captions")
+    return list(payload)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shared captioning service")
+    parser.add_argument("--address", default=os.getenv("INFERENCE_ADDRESS") or default_address())
+    args = parser.parse_args()
+    authkey = os.getenv("INFERENCE_AUTHKEY")
+    if not authkey:
+        raise SystemExit("Set INFERENCE_AUTHKEY (hex) to the key workers will use")
+
+    stop = threading.Event()
+
+    def _shutdown(signum: int, frame: Any) -> None:
+        stop.set()
+
+    signal.signal(signal.SIGINT, _shutdown)
+    signal.signal(signal.SIGTERM, _shutdown)
+    print(f"Serving captions on {args.address}", file=sys.stderr)
+    serve(args.address, bytes.fromhex(authkey), stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.utils.concurrency import env_int
+from app.utils.files import file_sha256
+from app.utils.paths import CACHE_DIR
+
+SONG_CACHE_DIR = CACHE_DIR / "songs"
+# Bump when the analysis output changes so stale cache entries are ignored.
+ANALYSIS_VERSION = 2
+SAMPLE_RATE = 22050
+ENERGY_HOP_S = 0.5
+# librosa's onset defaults at SAMPLE_RATE; streaming scales them to the file's rate.
+ONSET_N_FFT = 2048
+ONSET_HOP = 512
+ONSET_TOP_DB = 80.0
+STREAM_BLOCK_FRAMES = 1024
+
+
+@dataclass
+class SongAnalysis:
+    """Everything the song steps need, computed from one decode of the track."""
+
+    content_hash: str
+    duration: float
+    tempo: float
+    beats: np.ndarray
+    downbeats: np.ndarray
+    energy: np.ndarray
+    energy_hop_s: float
+    # Mean onset strength on the same grid as `energy`.
+    onset: np.ndarray
+
+    def beats_payload(self) -> Dict[str, Any]:
+        return {
+            "tempo": self.tempo,
+            "beats": [round(float(t), 3) for t in self.beats],
+            "downbeats": [round(float(t), 3) for t in self.downbeats],
+        }
+
+
+def _cache_path(content_hash: str) -> Path:
+    return SONG_CACHE_DIR / f"{content_hash}.npz"
+
+
+def load_analysis(content_hash: str) -> Optional[SongAnalysis]:
+    path = _cache_path(content_hash)
+    try:
+        with np.load(path) as payload:
+            if int(payload["version"]) != ANALYSIS_VERSION:
+                return None
+            return SongAnalysis(
+                content_hash=content_hash,
+                duration=float(payload["duration"]),
+                tempo=float(payload["tempo"]),
+                beats=payload["beats"],
+                downbeats=payload["downbeats"],
+                energy=payload["energy"],
+                energy_hop_s=float(payload["energy_hop_s"]),
+                onset=payload["onset"],
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def store_analysis(analysis: SongAnalysis) -> None:
+    SONG_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _cache_path(analysis.content_hash)
+    temp_path = path.with_name(f".{path.stem}.{os.getpid()}.tmp.npz")
+    np.savez(
+        temp_path,
+        version=np.int32(ANALYSIS_VERSION),
+        duration=np.float64(analysis.duration),
+        tempo=np.float64(analysis.tempo),
+        beats=analysis.beats.astype(np.float64),
+        downbeats=analysis.downbeats.astype(np.float64),
+        energy=analysis.energy.astype(np.float32),
+        energy_hop_s=np.float64(analysis.energy_hop_s),
+        onset=analysis.onset.astype(np.float32),
+    )
+    temp_path.replace(path)
+
+
+def _bin_onsets(onset_env: np.ndarray, frame_s: float, bin_s: float, bins: int) -> np.ndarray:
+    """Average an onset envelope into the centred bins of the energy curve."""
+    if bins == 0:
+        return np.zeros(0, dtype=np.float32)
+    index = np.floor(np.arange(len(onset_env)) * frame_s / bin_s + 0.5).astype(np.int64)
+    index = np.clip(index, 0, bins - 1)
+    totals = np.bincount(index, weights=onset_env, minlength=bins)
+    counts = np.bincount(index, minlength=bins)
+    return (totals / np.maximum(counts, 1)).astype(np.float32)
+
+
+def _decode_and_analyze(song_path: Path, content_hash: str) -> SongAnalysis:
+    try:
+        import librosa
+    except Exception as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError(f"librosa not available: {exc}")
+
+    y, sr = librosa.load(str(song_path), sr=SAMPLE_RATE, mono=True)
+    # The envelope beat_track would compute itself, kept for segment scoring.
+    onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=ONSET_HOP, aggregate=np.median)
+    tempo, beat_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, hop_length=ONSET_HOP)
+    beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=ONSET_HOP)
+
+    hop_length = int(ENERGY_HOP_S * sr)
+    energy = librosa.feature.rms(y=y, frame_length=hop_length, hop_length=hop_length)[0]
+    return SongAnalysis(
+        content_hash=content_hash,
+        duration=float(librosa.get_duration(y=y, sr=sr)),
+        tempo=float(np.atleast_1d(tempo)[0]),
+        beats=np.asarray(beat_times, dtype=np.float64),
+        downbeats=np.asarray(beat_times[::4], dtype=np.float64),
+        energy=np.asarray(energy, dtype=np.float32),
+        energy_hop_s=hop_length / sr,
+        onset=_bin_onsets(onset_env, ONSET_HOP / sr, hop_length / sr, len(energy)),
+    )
+
+
+def stream_min_seconds() -> int:
+    return env_int("SONG_STREAM_MIN_S", 600, minimum=0)
+
+
+def _stream_analyze(song_path: Path, content_hash: str) -> SongAnalysis:
+    """Same analysis as `_decode_and_analyze`, reading the file in blocks.
+
+    Works at the file's own sample rate with the onset FFT and hop scaled to
+    match, so only the onset envelope and per-half-second energy sums are kept;
+    memory no longer grows with the decoded audio. Mel frames are uncentred, and
+    the onset envelope is padded the way librosa pads centred frames. The 80 dB
+    floor uses the running maximum instead of the whole-track maximum.
+    """
+    try:
+        import librosa
+    except Exception as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError(f"librosa not available: {exc}")
+
+    sr = int(librosa.get_samplerate(str(song_path)))
+    scale = max(1, round(sr / SAMPLE_RATE))
+    n_fft = ONSET_N_FFT * scale
+    hop = ONSET_HOP * scale
+    energy_hop = int(ENERGY_HOP_S * sr)
+    mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft)
+
+    onset_blocks: list[np.ndarray] = []
+    previous_db: Optional[np.ndarray] = None
+    peak_db = -np.inf
+    energy_sums = np.zeros(0, dtype=np.float64)
+    consumed = 0
+    block_start = 0
+    stream = librosa.stream(
+        str(song_path),
+        block_length=STREAM_BLOCK_FRAMES,
+        frame_length=n_fft,
+        hop_length=hop,
+        mono=True,
+        fill_value=None,
+    )
+    for block in stream:
+        # Blocks overlap by n_fft - hop samples; count each sample's energy once.
+        fresh = block[consumed - block_start :]
+        if len(fresh):
+            # librosa's centred RMS frames: frame k covers [k*hop - hop/2, k*hop + hop/2).
+            bins = (np.arange(consumed, consumed + len(fresh)) + energy_hop // 2) // energy_hop
+            sums = np.bincount(bins - bins[0], weights=np.square(fresh, dtype=np.float64))
+            needed = int(bins[0]) + len(sums)
+            if needed > len(energy_sums):
+                energy_sums = np.pad(energy_sums, (0, needed - len(energy_sums)))
+            energy_sums[int(bins[0]) : needed] += sums
+            consumed += len(fresh)
+
+        if len(block) >= n_fft:
+            spectrum = np.abs(librosa.stft(block, n_fft=n_fft, hop_length=hop, center=False)) ** 2
+            mel_db = 10.0 * np.log10(np.maximum(1e-10, mel_basis @ spectrum))
+            peak_db = max(peak_db, float(mel_db.max()))
+            mel_db = np.maximum(mel_db, peak_db - ONSET_TOP_DB)
+            if previous_db is not None:
+                mel_db = np.concatenate([previous_db, mel_db], axis=1)
+            # Median across bands, as beat_track aggregates its own envelope.
+            flux = np.maximum(0.0, np.diff(mel_db, axis=1))
+            onset_blocks.append(np.median(flux, axis=0).astype(np.float32))
+            previous_db = mel_db[:, -1:]
+        block_start += STREAM_BLOCK_FRAMES * hop
+
+    onset_env = np.concatenate(
+        [np.zeros(1 + n_fft // (2 * hop), dtype=np.float32), *onset_blocks]
+    )
+    tempo, beat_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, hop_length=hop)
+    beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop)
+    frame_count = 1 + consumed // energy_hop
+    energy = np.sqrt(energy_sums[:frame_count] / energy_hop)
+    if len(energy) < frame_count:
+        energy = np.pad(energy, (0, frame_count - len(energy)))
+    return SongAnalysis(
+        content_hash=content_hash,
+        duration=consumed / sr,
+        tempo=float(np.atleast_1d(tempo)[0]),
+        beats=np.asarray(beat_times, dtype=np.float64),
+        downbeats=np.asarray(beat_times[::4], dtype=np.float64),
+        energy=energy.astype(np.float32),
+        energy_hop_s=energy_hop / sr,
+        onset=_bin_onsets(onset_env, hop / sr, energy_hop / sr, len(energy)),
+    )
+
+
+def _should_stream(song_path: Path) -> bool:
+    threshold = stream_min_seconds()
+    if threshold == 0:
+        return True
+    try:
+        import soundfile
+
+        return float(soundfile.info(str(song_path)).duration) >= threshold
+    except Exception:
+        return False
+
+
+def analyze_song(song_path: Path, content_hash: Optional[str] = None) -> SongAnalysis:
+    """Beats, downbeats, tempo and RMS energy for a song, cached by its content hash.
+
+    Tracks of at least `SONG_STREAM_MIN_S` seconds are analyzed in blocks.
+    """
+    content_hash = content_hash or file_sha256(song_path)
+    cached = load_analysis(content_hash)
+    if cached is not None:
+        return cached
+    analysis = None
+    if _should_stream(song_path):
+        try:
+            analysis = _stream_analyze(song_path, content_hash)
+        except Exception:
+            # Block reads need a libsndfile format; anything else decodes in full.
+            analysis = None
+    if analysis is None:
+        analysis = _decode_and_analyze(song_path, content_hash)
+    store_analysis(analysis)
+    return analysis
@@ -2,7 +2,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from app.audio.analysis import SongAnalysis
 
 
 @dataclass(frozen=True)
@@ -14,16 +19,107 @@ class SongSegment:
     loop_audio: bool
 
 
+SNAP_WINDOW_S = 0.5
+# `auto_energy` keeps the original loudest-window pick; `auto_score` blends all criteria.
+SECTION_WEIGHTS: Dict[str, Dict[str, float]] = {
+    "auto_energy": {"energy": 1.0},
+    "auto_score": {"energy": 0.45, "onset": 0.2, "beat_density": 0.15, "downbeat": 0.2},
+}
+
+
 def _clamp(value: float, minimum: float, maximum: float) -> float:
     return max(minimum, min(maximum, value))
 
 
-def _nearest_beat(beat_times: list[float], target: float) -> tuple[Optional[float], float]:
-    if not beat_times:
+def _nearest_beats(beat_times: np.ndarray, targets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Nearest beat to each target and its distance; ties go to the earlier beat."""
+    index = np.searchsorted(beat_times, targets)
+    before = beat_times[np.clip(index - 1, 0, len(beat_times) - 1)]
+    after = beat_times[np.clip(index, 0, len(beat_times) - 1)]
+    nearest = np.where(np.abs(targets - before) <= np.abs(after - targets), before, after)
+    return nearest, np.abs(nearest - targets)
+
+
+def _nearest_beat(beat_times: Any, target: float) -> tuple[Optional[float], float]:
+    times = np.asarray(beat_times, dtype=np.float64)
+    if len(times) == 0:
         return None, float("inf")
-    # simple linear scan is fine for short lists
-    best = min(beat_times, key=lambda beat: abs(beat - target))
-    return best, abs(best - target)
+    nearest, distance = _nearest_beats(times, np.array([target]))
+    return float(nearest[0]), float(distance[0])
+
+
+@dataclass(frozen=True)
+class SegmentCandidate:
+    start_s: float
+    score: float
+    features: Dict[str, float]
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    prefix = np.concatenate([[0.0], np.cumsum(values, dtype=np.float64)])
+    return prefix[window:] - prefix[:-window]
+
+
+def score_segments(
+    analysis: "SongAnalysis",
+    target_length_s: float,
+    min_start_s: float = 0.0,
+    top_k: int = 1,
+    weights: Optional[Dict[str, float]] = None,
+) -> list[SegmentCandidate]:
+    """Score every start on the energy grid at once and return the best `top_k`.
+
+    The criteria are summed energy and onset strength over the window, beats
+    inside it, and how close its start is to a downbeat. Each one is scaled to
+    [0, 1] before weighting. Picks are at least half a window apart so
+    alternatives are different sections of the song.
+    """
+    weights = weights or SECTION_WEIGHTS["auto_score"]
+    hop = analysis.energy_hop_s
+    window = max(1, int(target_length_s / hop))
+    count = len(analysis.energy) - window + 1
+    if count <= 0:
+        return []
+    starts = np.arange(count) * hop
+
+    beats = np.asarray(analysis.beats, dtype=np.float64)
+    downbeats = np.asarray(analysis.downbeats, dtype=np.float64)
+    features = {
+        "energy": _window_sums(analysis.energy, window),
+        "onset": _window_sums(analysis.onset, window),
+        "beat_density": (
+            np.searchsorted(beats, starts + target_length_s) - np.searchsorted(beats, starts)
+        ).astype(np.float64),
+        "downbeat": np.zeros(count),
+    }
+    if len(downbeats):
+        _, distance = _nearest_beats(downbeats, starts)
+        features["downbeat"] = np.clip(1.0 - distance / SNAP_WINDOW_S, 0.0, 1.0)
+    for name, values in features.items():
+        peak = values.max()
+        features[name] = values / peak if peak > 0 else np.zeros(count)
+    score = sum(weight * features[name] for name, weight in weights.items())
+
+    candidates = np.flatnonzero(starts >= min_start_s)
+    if len(candidates) == 0:
+        candidates = np.arange(count)
+    # Stable sort, so equal scores keep the earliest start like argmax did.
+    order = candidates[np.argsort(-score[candidates], kind="stable")]
+    gap = target_length_s / 2
+    picked: list[int] = []
+    for index in order.tolist():
+        if all(abs(starts[index] - starts[other]) >= gap for other in picked):
+            picked.append(index)
+            if len(picked) >= top_k:
+                break
+    return [
+        SegmentCandidate(
+            start_s=float(starts[index]),
+            score=round(float(score[index]), 4),
+            features={name: round(float(values[index]), 4) for name, values in features.items()},
+        )
+        for index in picked
+    ]
 
 
 def select_song_segment(
@@ -33,65 +129,78 @@ def select_song_segment(
     min_start_s: float,
     snap_to: str,
     beats_full: Optional[Dict[str, Any]] = None,
+    analysis: Optional["SongAnalysis"] = None,
 ) -> SongSegment:
-    try:
-        import librosa
-        import numpy as np
-    except Exception as exc:  # pragma: no cover - optional dependency
-        raise RuntimeError(f"librosa not available: {exc}")
+    """Pick the song window to cut to.
+
+    With a precomputed `analysis` the choice runs on its cached arrays;
+    otherwise the song is decoded here.
+    """
+    if analysis is None:
+        from app.audio.analysis import analyze_song
+
+        analysis = analyze_song(song_path)
+    return song_segment_options(
+        analysis, target_length_s, method, min_start_s, snap_to, beats_full, top_k=1
+    )[0][0]
+
 
+def song_segment_options(
+    analysis: "SongAnalysis",
+    target_length_s: float,
+    method: str,
+    min_start_s: float,
+    snap_to: str,
+    beats_full: Optional[Dict[str, Any]] = None,
+    top_k: int = 1,
+) -> list[tuple[SongSegment, Optional[SegmentCandidate]]]:
+    """The best `top_k` segments for `method`, best first, each with its scores."""
     method = (method or "auto_energy").lower()
     snap_to = (snap_to or "downbeat").lower()
-
-    y, sr = librosa.load(str(song_path), sr=22050, mono=True)
-    duration = float(librosa.get_duration(y=y, sr=sr))
+    duration = analysis.duration
 
     loop_audio = duration < target_length_s + 0.25
     if loop_audio:
-        return SongSegment(
+        segment = SongSegment(
             start_s=0.0,
             end_s=max(duration, target_length_s),
             method=method,
             snap=snap_to,
             loop_audio=True,
         )
+        return [(segment, None)]
 
-    start_s = 0.0
     if method == "manual":
-        start_s = min_start_s
+        candidates: list[Optional[SegmentCandidate]] = [None]
+        starts = [min_start_s]
     else:
-        # Auto energy selection
-        hop_length = int(0.5 * sr)
-        frame_length = hop_length
-        rms = librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0]
-        frame_times = librosa.frames_to_time(range(len(rms)), sr=sr, hop_length=hop_length)
-        if len(rms) == 0:
-            start_s = 0.0
-        else:
-            window_frames = max(1, int(target_length_s / 0.5))
-            window = np.ones(window_frames, dtype=np.float32)
-            energy = np.convolve(rms, window, mode="valid")
-            best_index = int(np.argmax(energy)) if len(energy) > 0 else 0
-            start_s = float(frame_times[best_index])
+        weights = SECTION_WEIGHTS.get(method, SECTION_WEIGHTS["auto_energy"])
+        scored = score_segments(analysis, target_length_s, min_start_s, max(1, top_k), weights)
+        candidates = list(scored) or [None]
+        starts = [candidate.start_s for candidate in scored] or [0.0]
 
     max_start = max(0.0, duration - target_length_s)
-    start_s = _clamp(float(start_s), float(min_start_s), max_start)
-
-    # Snap start to nearest beat/downbeat within 0.5s
-    if beats_full and snap_to in {"downbeat", "beat"}:
-        beat_key = "downbeats" if snap_to == "downbeat" else "beats"
-        beat_times = beats_full.get(beat_key, []) if isinstance(beats_full, dict) else []
-        beat, diff = _nearest_beat(beat_times, start_s)
-        if beat is not None and diff <= 0.5:
-            start_s = _clamp(float(beat), float(min_start_s), max_start)
-
-    return SongSegment(
-        start_s=round(start_s, 3),
-        end_s=round(start_s + target_length_s, 3),
-        method=method,
-        snap=snap_to,
-        loop_audio=False,
-    )
+    options: list[tuple[SongSegment, Optional[SegmentCandidate]]] = []
+    for start_s, candidate in zip(starts, candidates):
+        start_s = _clamp(float(start_s), float(min_start_s), max_start)
+
+        # Snap start to nearest beat/downbeat within 0.5s
+        if beats_full and snap_to in {"downbeat", "beat"}:
+            beat_key = "downbeats" if snap_to == "downbeat" else "beats"
+            beat_times = beats_full.get(beat_key, []) if isinstance(beats_full, dict) else []
+            beat, diff = _nearest_beat(beat_times, start_s)
+            if beat is not None and diff <= SNAP_WINDOW_S:
+                start_s = _clamp(float(beat), float(min_start_s), max_start)
+
+        segment = SongSegment(
+            start_s=round(start_s, 3),
+            end_s=round(start_s + target_length_s, 3),
+            method=method,
+            snap=snap_to,
+            loop_audio=False,
+        )
+        options.append((segment, candidate))
+    return options
 
 
 def slice_beats(beats_full: Dict[str, Any], start_s: float, end_s: float) -> Dict[str, Any]:
@@ -99,8 +208,12 @@ def slice_beats(beats_full: Dict[str, Any], start_s: float, end_s: float) -> Dic
     downbeats = beats_full.get("downbeats", []) if isinstance(beats_full, dict) else []
     tempo = beats_full.get("tempo") if isinstance(beats_full, dict) else None
 
-    def _slice(values: list[float]) -> list[float]:
-        return [round(t - start_s, 3) for t in values if start_s <= t <= end_s]
+    def _slice(values: Any) -> list[float]:
+        # Beat grids are sorted, so the window is a contiguous run.
+        times = np.asarray(values, dtype=np.float64)
+        lo = int(np.searchsorted(times, start_s, side="left"))
+        hi = int(np.searchsorted(times, end_s, side="right"))
+        return [round(float(t) - start_s, 3) for t in times[lo:hi]]
 
     return {
         "tempo": tempo,
@@ -1,14 +1,66 @@
 from __future__ import annotations
 
-import shutil
+import os
+import sqlite3
+import threading
 import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, BinaryIO, Iterator, Optional
 
+from app.utils.ffmpeg import FFmpegError, ffprobe_video_info
+from app.utils.files import copy_and_hash, file_sha256, link_or_copy
 from app.utils.paths import ROOT_DIR
 
 LIBRARY_DIR = ROOT_DIR / "library" / "glasses"
+BLOB_DIR = ROOT_DIR / "library" / "blobs"
+INDEX_PATH = ROOT_DIR / "library" / "index.sqlite"
+
+LIBRARY_SORT_COLUMNS = {
+    "name": "name",
+    "size": "size",
+    "modified_at": "mtime",
+    "duration": "duration",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    duration REAL,
+    width INTEGER,
+    height INTEGER,
+    codec TEXT,
+    content_hash TEXT,
+    analysis_state TEXT NOT NULL DEFAULT 'none'
+);
+CREATE INDEX IF NOT EXISTS clips_content_hash ON clips (content_hash);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_SCHEMA_LOCK = threading.Lock()
+_SCHEMA_READY = False
+
+
+@dataclass(frozen=True)
+class LibraryClip:
+    name: str
+    path: Path
+    content_hash: str
+    duplicate: bool = False
+
+
+@dataclass(frozen=True)
+class LibraryPage:
+    items: list[dict[str, Any]]
+    total: int
+    generation: int
 
 
 def ensure_library_dir() -> Path:
@@ -31,31 +83,284 @@ def unique_library_name(name: Optional[str]) -> str:
     return candidate
 
 
-def store_library_file(source: Path, name: Optional[str] = None) -> Path:
-    destination = ensure_library_dir() / unique_library_name(name or source.name)
-    shutil.copy2(source, destination)
-    return destination
+def blob_path(content_hash: str) -> Path:
+    return BLOB_DIR / content_hash[:2] / content_hash
 
 
-def list_library_files() -> list[dict[str, Any]]:
-    ensure_library_dir()
-    items: list[dict[str, Any]] = []
-    for path in sorted(LIBRARY_DIR.iterdir()):
-        if not path.is_file():
+def _find_blob_name(blob: Path) -> Optional[Path]:
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT name FROM clips WHERE content_hash = ? ORDER BY name",
+            (blob.name,),
+        ).fetchall()
+    for row in rows:
+        candidate = LIBRARY_DIR / row["name"]
+        try:
+            if candidate.samefile(blob):
+                return candidate
+        except OSError:
+            continue
+    for path in ensure_library_dir().iterdir():
+        try:
+            if path.is_file() and path.samefile(blob):
+                return path
+        except OSError:
             continue
-        stat = path.stat()
-        items.append(
-            {
-                "name": path.name,
-                "size": stat.st_size,
-                "modified_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
-            }
+    return None
+
+
+def _commit_blob(temp_path: Path, name: Optional[str], content_hash: str) -> LibraryClip:
+    blob = blob_path(content_hash)
+    if blob.exists():
+        temp_path.unlink(missing_ok=True)
+        existing = _find_blob_name(blob)
+        if existing is not None:
+            index_library_file(existing, content_hash)
+            return LibraryClip(
+                name=existing.name,
+                path=existing,
+                content_hash=content_hash,
+                duplicate=True,
+            )
+    else:
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        temp_path.replace(blob)
+
+    destination = ensure_library_dir() / unique_library_name(name)
+    link_or_copy(blob, destination)
+    index_library_file(destination, content_hash)
+    return LibraryClip(name=destination.name, path=destination, content_hash=content_hash)
+
+
+def store_library_stream(stream: BinaryIO, name: Optional[str]) -> LibraryClip:
+    """Store an upload in the blob store, reusing the existing entry for identical content."""
+    BLOB_DIR.mkdir(parents=True, exist_ok=True)
+    temp_path = BLOB_DIR / f".incoming_{uuid.uuid4().hex}"
+    try:
+        content_hash = copy_and_hash(stream, temp_path)
+        return _commit_blob(temp_path, name, content_hash)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def store_library_file(source: Path, name: Optional[str] = None) -> LibraryClip:
+    with source.open("rb") as handle:
+        return store_library_stream(handle, name or source.name)
+
+
+def library_content_hash(path: Path) -> str:
+    """Content hash of a library file, adopting pre-blob-store files into the store."""
+    stat = path.stat()
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT content_hash FROM clips WHERE name = ? AND size = ? AND mtime = ?",
+            (path.name, stat.st_size, stat.st_mtime),
+        ).fetchone()
+    if row is not None and row["content_hash"]:
+        return str(row["content_hash"])
+
+    content_hash = file_sha256(path)
+    blob = blob_path(content_hash)
+    if not blob.exists():
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(path, blob)
+        except OSError:
+            pass
+    index_library_file(path, content_hash)
+    return content_hash
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    global _SCHEMA_READY
+    INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(INDEX_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        if not _SCHEMA_READY:
+            with _SCHEMA_LOCK:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _SCHEMA_READY = True
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _bump_generation(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES ('generation', '1') "
+        "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+    )
+
+
+def _meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return None if row is None else str(row["value"])
+
+
+def _probe(path: Path) -> dict[str, Any]:
+    try:
+        return ffprobe_video_info(path)
+    except (FFmpegError, OSError, ValueError):
+        return {"duration": None, "width": None, "height": None, "codec": None}
+
+
+def index_library_file(path: Path, content_hash: Optional[str] = None) -> None:
+    stat = path.stat()
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT size, mtime, duration, content_hash FROM clips WHERE name = ?",
+            (path.name,),
+        ).fetchone()
+        unchanged = (
+            row is not None
+            and row["size"] == stat.st_size
+            and row["mtime"] == stat.st_mtime
+            and row["duration"] is not None
+        )
+        if unchanged:
+            if content_hash and row["content_hash"] != content_hash:
+                conn.execute(
+                    "UPDATE clips SET content_hash = ? WHERE name = ?",
+                    (content_hash, path.name),
+                )
+                _bump_generation(conn)
+            return
+        info = _probe(path)
+        conn.execute(
+            """
+            INSERT INTO clips (name, size, mtime, duration, width, height, codec, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                size = excluded.size,
+                mtime = excluded.mtime,
+                duration = excluded.duration,
+                width = excluded.width,
+                height = excluded.height,
+                codec = excluded.codec,
+                content_hash = COALESCE(excluded.content_hash, clips.content_hash)
+            """,
+            (
+                path.name,
+                stat.st_size,
+                stat.st_mtime,
+                info["duration"],
+                info["width"],
+                info["height"],
+                info["codec"],
+                content_hash,
+            ),
+        )
+        _bump_generation(conn)
+
+
+def sync_library_index() -> int:
+    """Reconcile the index with files added or removed outside the API.
+
+    Only runs when the library directory's mtime moves, so steady-state polling
+    costs a single stat plus one indexed query.
+    """
+    library_dir = ensure_library_dir()
+    dir_mtime = str(library_dir.stat().st_mtime_ns)
+    with _connect() as conn:
+        if _meta(conn, "dir_mtime_ns") == dir_mtime:
+            return int(_meta(conn, "generation") or 0)
+        indexed = {row["name"] for row in conn.execute("SELECT name FROM clips")}
+
+    on_disk = {
+        path.name
+        for path in library_dir.iterdir()
+        if path.is_file() and not path.name.startswith(".")
+    }
+    for name in sorted(on_disk - indexed):
+        index_library_file(library_dir / name)
+
+    with _connect() as conn:
+        removed = sorted(indexed - on_disk)
+        if removed:
+            conn.executemany("DELETE FROM clips WHERE name = ?", [(name,) for name in removed])
+            _bump_generation(conn)
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('dir_mtime_ns', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (dir_mtime,),
+        )
+        return int(_meta(conn, "generation") or 0)
+
+
+def set_analysis_state(content_hash: str, state: str) -> None:
+    with _connect() as conn:
+        conn.execute(
+            "UPDATE clips SET analysis_state = ? WHERE content_hash = ?",
+            (state, content_hash),
         )
-    return items
+        _bump_generation(conn)
+
+
+def _library_item(row: sqlite3.Row) -> dict[str, Any]:
+    return {
+        "name": row["name"],
+        "size": row["size"],
+        "modified_at": datetime.fromtimestamp(row["mtime"], timezone.utc).isoformat(),
+        "duration": row["duration"],
+        "width": row["width"],
+        "height": row["height"],
+        "codec": row["codec"],
+        "content_hash": row["content_hash"],
+        "analysis_state": row["analysis_state"],
+    }
+
+
+def list_library_files(
+    offset: int = 0,
+    limit: Optional[int] = None,
+    sort: str = "name",
+    descending: bool = False,
+    query: Optional[str] = None,
+    analysis_state: Optional[str] = None,
+    codec: Optional[str] = None,
+    sync: bool = True,
+) -> LibraryPage:
+    """One page of the index. Pass `sync=False` if the caller just synced it."""
+    generation = sync_library_index() if sync else None
+    column = LIBRARY_SORT_COLUMNS.get(sort, "name")
+    direction = "DESC" if descending else "ASC"
+
+    clauses: list[str] = []
+    params: list[Any] = []
+    if query:
+        clauses.append("name LIKE ? ESCAPE '\\'")
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(f"%{escaped}%")
+    if analysis_state:
+        clauses.append("analysis_state = ?")
+        params.append(analysis_state)
+    if codec:
+        clauses.append("codec = ?")
+        params.append(codec)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    with _connect() as conn:
+        if generation is None:
+            generation = int(_meta(conn, "generation") or 0)
+        total = int(conn.execute(f"SELECT COUNT(*) FROM clips {where}", params).fetchone()[0])
+        rows = conn.execute(
+            f"SELECT * FROM clips {where} ORDER BY {column} {direction}, name ASC "
+            "LIMIT ? OFFSET ?",
+            [*params, -1 if limit is None else limit, max(0, offset)],
+        ).fetchall()
+    return LibraryPage(
+        items=[_library_item(row) for row in rows],
+        total=total,
+        generation=generation,
+    )
 
 
 def resolve_library_file(name: str) -> Path:
-    candidate = ensure_library_dir() / name
-    if not candidate.exists():
+    candidate = ensure_library_dir() / Path(name).name
+    if not candidate.is_file():
         raise FileNotFoundError(name)
     return candidate
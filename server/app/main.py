@@ -1,32 +1,89 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+import os
 import shutil
 import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
 import subprocess
-from fastapi import BackgroundTasks, FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import (
+    FastAPI,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
+from app.audio.analysis import SongAnalysis, load_analysis
+from app.audio.segment import SECTION_WEIGHTS, song_segment_options
 from app.library import (
-    ensure_library_dir,
+    LIBRARY_SORT_COLUMNS,
+    LibraryClip,
+    library_content_hash,
     list_library_files,
     resolve_library_file,
     store_library_file,
-    unique_library_name,
+    store_library_stream,
+    sync_library_index,
 )
-from app.pipeline.runner import ClipInput, run_job
+from app.pipeline.ingest import schedule_preanalysis, schedule_song_analysis
+from app.pipeline import jobqueue
+from app.pipeline.checkpoint import StageManifest
+from app.pipeline.derive import derive_job
+from app.pipeline.runner import DEFAULT_SETTINGS, ClipInput
+from app.songs import get_song, list_songs, resolve_song, store_song_stream
+from app.utils.events import HUB
+from app.utils.files import file_sha256, link_or_copy
 from app.utils.paths import ROOT_DIR, ensure_job_dirs, get_job_paths
-from app.utils.status import read_status, write_status
+from app.utils.status import TERMINAL_STATUSES, read_status, write_status
 
 ALLOWED_CLIP_EXTENSIONS = {".mp4", ".mov", ".webm"}
 ALLOWED_SONG_EXTENSIONS = {".mp3", ".m4a", ".wav"}
+MAX_VARIANTS = 8
+MAX_SONG_SECTIONS = 10
+STREAM_POLL_S = 0.5
+STREAM_KEEPALIVE_S = 15.0
+ARTIFACT_FILES = {
+    "preview": "preview.mp4",
+    "final": "final.mp4",
+    "edl": "edl.json",
+}
+# status.json per job as (mtime_ns, payload), so it is re-read only after a write.
+_DISK_STATUS: dict[str, tuple[int, Optional[dict[str, Any]]]] = {}
+_DISK_STATUS_MAX = 1024
+
+
+def _embedded_workers_enabled() -> bool:
+    return os.getenv("JOB_WORKERS_EMBEDDED", "1").lower() not in {"0", "false", "no"}
+
+
+@asynccontextmanager
+async def _lifespan(_: FastAPI) -> AsyncIterator[None]:
+    pool = None
+    if _embedded_workers_enabled():
+        from app.worker import WorkerPool
+
+        pool = WorkerPool(publish_events=True)
+        pool.start()
+        HUB.attach(pool.events, asyncio.get_running_loop())
+    try:
+        yield
+    finally:
+        if pool is not None:
+            pool.stop()
+
 
-app = FastAPI(title="Code X Local API", version="0.1")
+app = FastAPI(title="Code X Local API", version="0.1", lifespan=_lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -58,6 +115,59 @@ def _parse_settings(settings_raw: Optional[str]) -> dict[str, Any]:
     return payload
 
 
+def _queue_job(job_id: str, message: str = "Queued", kind: str = "render") -> None:
+    payload = write_status(
+        get_job_paths(job_id).status_path,
+        {
+            "job_id": job_id,
+            "status": "queued",
+            "step": "queued",
+            "progress": 0.0,
+            "message": message,
+        },
+    )
+    HUB.publish({"type": "status", **payload})
+    jobqueue.enqueue(job_id, kind)
+
+
+def _queue_variants(job_id: str, variant_entries: list[dict[str, Any]]) -> None:
+    for entry in variant_entries:
+        payload = write_status(
+            get_job_paths(entry["job_id"]).status_path,
+            {
+                "job_id": entry["job_id"],
+                "status": "queued",
+                "step": "queued",
+                "progress": 0.0,
+                "message": "Waiting for shared analysis",
+                "parent_job_id": job_id,
+            },
+        )
+        HUB.publish({"type": "status", **payload})
+
+
+def _check_setting_keys(settings: dict[str, Any]) -> None:
+    unknown = sorted(set(settings) - set(DEFAULT_SETTINGS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown settings: {', '.join(unknown)}")
+
+
+def _parse_variants(raw: str) -> list[dict[str, Any]]:
+    try:
+        payload = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid variants JSON: {exc}") from exc
+    if not isinstance(payload, list) or not all(isinstance(item, dict) for item in payload):
+        raise HTTPException(status_code=400, detail="variants must be a JSON array of objects")
+    if not payload:
+        raise HTTPException(status_code=400, detail="variants cannot be empty")
+    if len(payload) > MAX_VARIANTS:
+        raise HTTPException(status_code=400, detail=f"Maximum of {MAX_VARIANTS} variants allowed")
+    for item in payload:
+        _check_setting_keys(item)
+    return payload
+
+
 def _parse_clip_names(raw: Optional[str]) -> list[str]:
     if not raw:
         raise HTTPException(status_code=400, detail="clip_names is required")
@@ -73,12 +183,47 @@ def _parse_clip_names(raw: Optional[str]) -> list[str]:
     return names
 
 
+def _check_song(
+    song: Optional[UploadFile], song_id: Optional[str]
+) -> Optional[tuple[Path, dict[str, Any]]]:
+    """Validate a job's song: an upload or a song library id, never both."""
+    if (song is None) == (not song_id):
+        raise HTTPException(status_code=400, detail="Provide either a song upload or a song_id")
+    if song_id:
+        try:
+            return resolve_song(song_id)
+        except FileNotFoundError as exc:
+            raise HTTPException(status_code=404, detail=f"Song not found: {song_id}") from exc
+    if _safe_suffix(song.filename) not in ALLOWED_SONG_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported song format: {song.filename}")
+    return None
+
+
+def _attach_song(
+    input_dir: Path,
+    song: Optional[UploadFile],
+    library_song: Optional[tuple[Path, dict[str, Any]]],
+) -> dict[str, Any]:
+    if library_song is not None:
+        source, entry = library_song
+        destination = input_dir / f"song{entry['suffix']}"
+        link_or_copy(source, destination)
+        return {"filename": entry["filename"], "path": str(destination), "song_id": entry["song_id"]}
+    destination = input_dir / f"song{_safe_suffix(song.filename)}"
+    _save_upload(song, destination)
+    return {"filename": song.filename, "path": str(destination)}
+
+
 class ImportPathRequest(BaseModel):
     path: str
     recursive: bool = False
     max_files: int = 200
 
 
+class RerenderRequest(BaseModel):
+    settings: dict[str, Any] = Field(default_factory=dict)
+
+
 @app.get("/health")
 async def health() -> dict[str, str]:
     return {"status": "ok"}
@@ -122,13 +267,13 @@ async def version() -> dict[str, Any]:
     return {"version": "local-dev", "git": _git_info()}
 
 
-@app.post("/jobs")
-async def create_job(
-    background_tasks: BackgroundTasks,
-    clips: list[UploadFile] = File(...),
-    song: UploadFile = File(...),
-    settings: Optional[str] = Form(default=None),
-) -> dict[str, str]:
+def _create_upload_job(
+    clips: list[UploadFile],
+    song: Optional[UploadFile],
+    song_id: Optional[str],
+    settings_payload: dict[str, Any],
+    extra: Optional[dict[str, Any]] = None,
+) -> str:
     if len(clips) == 0:
         raise HTTPException(status_code=400, detail="At least one clip is required")
     if len(clips) > 20:
@@ -138,10 +283,7 @@ async def create_job(
         if _safe_suffix(clip.filename) not in ALLOWED_CLIP_EXTENSIONS:
             raise HTTPException(status_code=400, detail=f"Unsupported clip format: {clip.filename}")
 
-    if _safe_suffix(song.filename) not in ALLOWED_SONG_EXTENSIONS:
-        raise HTTPException(status_code=400, detail=f"Unsupported song format: {song.filename}")
-
-    settings_payload = _parse_settings(settings)
+    library_song = _check_song(song, song_id)
 
     job_id = uuid.uuid4().hex
     paths = ensure_job_dirs(job_id)
@@ -153,41 +295,66 @@ async def create_job(
         _save_upload(clip, destination)
         clip_inputs.append(ClipInput(clip_id=clip_id, path=destination, original_name=clip.filename))
 
-    song_destination = paths.input_dir / f"song{_safe_suffix(song.filename)}"
-    _save_upload(song, song_destination)
+    song_payload = _attach_song(paths.input_dir, song, library_song)
 
     job_payload = {
         "job_id": job_id,
+        **(extra or {}),
         "settings": settings_payload,
         "clips": [
             {"clip_id": clip.clip_id, "filename": clip.original_name, "path": str(clip.path)}
             for clip in clip_inputs
         ],
-        "song": {"filename": song.filename, "path": str(song_destination)},
+        "song": song_payload,
     }
     paths.job_path.write_text(json.dumps(job_payload, indent=2))
+    return job_id
 
-    write_status(
-        paths.status_path,
-        {
-            "job_id": job_id,
-            "status": "queued",
-            "step": "queued",
-            "progress": 0.0,
-            "message": "Queued",
-        },
-    )
-
-    background_tasks.add_task(run_job, job_id, clip_inputs, song_destination, settings_payload)
 
+@app.post("/jobs")
+async def create_job(
+    clips: list[UploadFile] = File(...),
+    song: Optional[UploadFile] = File(default=None),
+    song_id: Optional[str] = Form(default=None),
+    settings: Optional[str] = Form(default=None),
+) -> dict[str, str]:
+    settings_payload = _parse_settings(settings)
+    job_id = _create_upload_job(clips, song, song_id, settings_payload)
+    _queue_job(job_id)
     return {"job_id": job_id}
 
 
+@app.post("/jobs/batch")
+async def create_batch_job(
+    clips: list[UploadFile] = File(...),
+    variants: str = Form(...),
+    song: Optional[UploadFile] = File(default=None),
+    song_id: Optional[str] = Form(default=None),
+    settings: Optional[str] = Form(default=None),
+) -> dict[str, Any]:
+    settings_payload = _parse_settings(settings)
+    variant_settings = _parse_variants(variants)
+
+    variant_entries = [
+        {"job_id": uuid.uuid4().hex, "settings": delta} for delta in variant_settings
+    ]
+    job_id = _create_upload_job(
+        clips,
+        song,
+        song_id,
+        settings_payload,
+        extra={"source": "batch", "variants": variant_entries},
+    )
+    _queue_variants(job_id, variant_entries)
+    _queue_job(job_id, "Queued (shared analysis)", kind="batch")
+    return {"job_id": job_id, "variant_job_ids": [entry["job_id"] for entry in variant_entries]}
+
+
 @app.post("/jobs/from-library")
 async def create_job_from_library(
-    background_tasks: BackgroundTasks,
-    song: UploadFile = File(...),
     clip_names: str = Form(...),
+    song: Optional[UploadFile] = File(default=None),
+    song_id: Optional[str] = Form(default=None),
     settings: Optional[str] = Form(default=None),
 ) -> dict[str, str]:
     names = _parse_clip_names(clip_names)
@@ -197,9 +364,7 @@ async def create_job_from_library(
     if len(names) > 20:
         raise HTTPException(status_code=400, detail="Maximum of 20 clips allowed")
 
-    if _safe_suffix(song.filename) not in ALLOWED_SONG_EXTENSIONS:
-        raise HTTPException(status_code=400, detail=f"Unsupported song format: {song.filename}")
-
+    library_song = _check_song(song, song_id)
     settings_payload = _parse_settings(settings)
 
     job_id = uuid.uuid4().hex
@@ -216,66 +381,263 @@ async def create_job_from_library(
             raise HTTPException(status_code=400, detail=f"Unsupported clip format: {name}")
         clip_id = f"c{index}"
         destination = paths.input_dir / f"{clip_id}{suffix}"
-        shutil.copy2(source, destination)
-        clip_inputs.append(ClipInput(clip_id=clip_id, path=destination, original_name=name))
-
-    song_destination = paths.input_dir / f"song{_safe_suffix(song.filename)}"
-    _save_upload(song, song_destination)
+        link_or_copy(source, destination)
+        clip_inputs.append(
+            ClipInput(
+                clip_id=clip_id,
+                path=destination,
+                original_name=name,
+                content_hash=library_content_hash(source),
+            )
+        )
+
+    song_payload = _attach_song(paths.input_dir, song, library_song)
 
     job_payload = {
         "job_id": job_id,
         "source": "library",
         "settings": settings_payload,
-        "clips": [{"clip_id": clip.clip_id, "filename": clip.original_name} for clip in clip_inputs],
-        "song": {"filename": song.filename, "path": str(song_destination)},
+        "clips": [
+            {
+                "clip_id": clip.clip_id,
+                "filename": clip.original_name,
+                "path": str(clip.path),
+                "content_hash": clip.content_hash,
+            }
+            for clip in clip_inputs
+        ],
+        "song": song_payload,
     }
     paths.job_path.write_text(json.dumps(job_payload, indent=2))
 
-    write_status(
-        paths.status_path,
-        {
-            "job_id": job_id,
-            "status": "queued",
-            "step": "queued",
-            "progress": 0.0,
-            "message": "Queued",
-        },
-    )
-
-    background_tasks.add_task(run_job, job_id, clip_inputs, song_destination, settings_payload)
+    _queue_job(job_id)
 
     return {"job_id": job_id}
 
 
+def _disk_status(job_id: str, status_path: Path) -> Optional[dict[str, Any]]:
+    try:
+        mtime = status_path.stat().st_mtime_ns
+    except OSError:
+        return None
+    cached = _DISK_STATUS.get(job_id)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    status = read_status(status_path)
+    if len(_DISK_STATUS) >= _DISK_STATUS_MAX:
+        _DISK_STATUS.clear()
+    _DISK_STATUS[job_id] = (mtime, status)
+    return status
+
+
+def _current_status(job_id: str) -> Optional[dict[str, Any]]:
+    # Only trust the hub while it is fed by the embedded workers. A standalone
+    # worker may have claimed the job and report through status.json alone, so
+    # the file wins whenever its update is newer than the hub's latest.
+    status_path = get_job_paths(job_id).status_path
+    if HUB.live:
+        status = HUB.latest(job_id)
+        if status is not None:
+            on_disk = _disk_status(job_id, status_path)
+            if on_disk is not None and str(on_disk.get("updated_at")) > str(status.get("updated_at")):
+                return on_disk
+            return status
+    return read_status(status_path)
+
+
+def _artifact_urls(job_id: str, status: dict[str, Any]) -> dict[str, str]:
+    # Artifact events from the hub save the stat calls while a job is running.
+    # Otherwise a retry or re-render may have removed files, so check the disk.
+    names = HUB.artifacts(job_id) if status.get("status") == "running" else set()
+    if not names:
+        paths = get_job_paths(job_id)
+        names = {
+            name
+            for name, filename in ARTIFACT_FILES.items()
+            if (paths.edl_path if name == "edl" else paths.output_dir / filename).exists()
+        }
+    return {
+        name: f"/jobs/{job_id}/{filename}"
+        for name, filename in ARTIFACT_FILES.items()
+        if name in names
+    }
+
+
+def _job_response(job_id: str, status: dict[str, Any]) -> dict[str, Any]:
+    response: dict[str, Any] = {"job_id": job_id, **status}
+    if status.get("status") == "queued":
+        response["queue_position"] = jobqueue.queue_position(job_id)
+    artifacts = _artifact_urls(job_id, status)
+    if artifacts:
+        response["artifact_urls"] = artifacts
+    return response
+
+
+def _sse(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.get("/jobs/{job_id}")
 async def get_job(job_id: str) -> dict[str, Any]:
-    paths = get_job_paths(job_id)
-    status = read_status(paths.status_path)
+    status = _current_status(job_id)
     if status is None:
         raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job_id, status)
 
-    response: dict[str, Any] = {"job_id": job_id, **status}
-    artifacts: dict[str, str] = {}
-    preview_path = paths.output_dir / "preview.mp4"
-    final_path = paths.output_dir / "final.mp4"
-    edl_path = paths.edl_path
-
-    if preview_path.exists():
-        artifacts["preview"] = f"/jobs/{job_id}/preview.mp4"
-    if final_path.exists():
-        artifacts["final"] = f"/jobs/{job_id}/final.mp4"
-    if edl_path.exists():
-        artifacts["edl"] = f"/jobs/{job_id}/edl.json"
 
-    if artifacts:
-        response["artifact_urls"] = artifacts
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request) -> StreamingResponse:
+    if _current_status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    status_path = get_job_paths(job_id).status_path
 
-    return response
+    async def _events() -> AsyncIterator[str]:
+        queue = HUB.subscribe(job_id)
+        try:
+            status = _current_status(job_id) or {}
+            last_sent = str(status.get("updated_at", ""))
+            last_mtime = status_path.stat().st_mtime_ns if status_path.exists() else 0
+            idle = 0.0
+            yield _sse("status", _job_response(job_id, status))
+            if status.get("status") in TERMINAL_STATUSES:
+                return
+
+            while not await request.is_disconnected():
+                try:
+                    event: Optional[dict[str, Any]] = await asyncio.wait_for(
+                        queue.get(), timeout=STREAM_POLL_S
+                    )
+                except asyncio.TimeoutError:
+                    event = None
+
+                # status.json is polled even with a live hub: a standalone
+                # worker may be running this job. Stale copies are dropped below.
+                if event is None:
+                    mtime = status_path.stat().st_mtime_ns if status_path.exists() else 0
+                    if mtime != last_mtime:
+                        last_mtime = mtime
+                        disk_status = _disk_status(job_id, status_path)
+                        if disk_status:
+                            event = {"type": "status", **disk_status}
+
+                if event is None:
+                    idle += STREAM_POLL_S
+                    if idle >= STREAM_KEEPALIVE_S:
+                        idle = 0.0
+                        yield ": keep-alive\n\n"
+                    continue
+                idle = 0.0
+
+                if event.get("type") == "artifact":
+                    name = str(event.get("name"))
+                    if name in ARTIFACT_FILES:
+                        yield _sse(
+                            "artifact",
+                            {"job_id": job_id, "name": name, "url": f"/jobs/{job_id}/{ARTIFACT_FILES[name]}"},
+                        )
+                    continue
+
+                status = {key: value for key, value in event.items() if key != "type"}
+                updated_at = str(status.get("updated_at", ""))
+                if updated_at and updated_at <= last_sent:
+                    continue
+                last_sent = updated_at
+                yield _sse("status", _job_response(job_id, status))
+                if status.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            HUB.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
-@app.get("/glasses/library")
-async def get_glasses_library() -> dict[str, Any]:
-    return {"items": list_library_files()}
+@app.post("/jobs/{job_id}/retry")
+async def retry_job(job_id: str) -> dict[str, Any]:
+    paths = get_job_paths(job_id)
+    status = read_status(paths.status_path)
+    if status is None or not paths.job_path.exists():
+        raise HTTPException(status_code=404, detail="Job not found")
+    if status.get("status") in {"queued", "running"}:
+        raise HTTPException(status_code=409, detail="Job is still in progress")
+
+    resume_from = StageManifest.load(paths.manifest_path).last_good_stage()
+    message = f"Retrying after {resume_from}" if resume_from else "Retrying"
+    job = json.loads(paths.job_path.read_text())
+    if job.get("source") == "batch":
+        # A batch parent reruns its shared analysis and then every variant.
+        _queue_variants(job_id, job.get("variants", []))
+        _queue_job(job_id, message, kind="batch")
+    else:
+        _queue_job(job_id, message)
+    return {"job_id": job_id, "resume_from": resume_from}
+
+
+@app.post("/jobs/{job_id}/rerender")
+async def rerender_job(job_id: str, payload: RerenderRequest) -> dict[str, str]:
+    paths = get_job_paths(job_id)
+    status = read_status(paths.status_path)
+    if status is None or not paths.job_path.exists():
+        raise HTTPException(status_code=404, detail="Job not found")
+    if status.get("status") in {"queued", "running"}:
+        raise HTTPException(status_code=409, detail="Job is still in progress")
+    _check_setting_keys(payload.settings)
+
+    derived_id = derive_job(job_id, payload.settings)
+    _queue_job(derived_id, "Queued (re-render)")
+    return {"job_id": derived_id, "parent_job_id": job_id}
+
+
+@app.get("/glasses/library", response_model=None)
+async def get_glasses_library(
+    request: Request,
+    response: Response,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    sort: str = "name",
+    order: str = "asc",
+    q: Optional[str] = None,
+    analysis_state: Optional[str] = None,
+    codec: Optional[str] = None,
+) -> Any:
+    if sort not in LIBRARY_SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort: {sort}")
+    if order not in {"asc", "desc"}:
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    offset = max(0, offset)
+    if limit is not None:
+        limit = max(1, min(limit, 1000))
+
+    # The ETag only depends on the index generation and the query, so unchanged
+    # polls are answered before touching the clip rows. `no-cache` makes browsers
+    # revalidate with If-None-Match instead of guessing freshness.
+    generation = sync_library_index()
+    query_key = hashlib.sha1(str(sorted(request.query_params.multi_items())).encode()).hexdigest()
+    etag = f'W/"library-{generation}-{query_key[:12]}"'
+    cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
+
+    page = list_library_files(
+        offset=offset,
+        limit=limit,
+        sort=sort,
+        descending=order == "desc",
+        query=q,
+        analysis_state=analysis_state,
+        codec=codec,
+        sync=False,
+    )
+    response.headers.update(cache_headers)
+    return {
+        "items": page.items,
+        "total": page.total,
+        "offset": offset,
+        "limit": limit,
+    }
 
 
 @app.post("/glasses/import")
@@ -285,21 +647,30 @@ async def import_glasses(
     if len(clips) == 0:
         raise HTTPException(status_code=400, detail="At least one clip is required")
 
-    library_dir = ensure_library_dir()
     imported: list[str] = []
     skipped: list[str] = []
+    duplicates: list[str] = []
+    stored_clips: list[LibraryClip] = []
 
     for clip in clips:
         suffix = _safe_suffix(clip.filename)
         if suffix not in ALLOWED_CLIP_EXTENSIONS:
             skipped.append(clip.filename or "unknown")
             continue
-        name = unique_library_name(clip.filename)
-        destination = library_dir / name
-        _save_upload(clip, destination)
-        imported.append(name)
+        stored = store_library_stream(clip.file, clip.filename)
+        stored_clips.append(stored)
+        imported.append(stored.name)
+        if stored.duplicate:
+            duplicates.append(stored.name)
 
-    return {"imported": imported, "skipped": skipped, "count": len(imported)}
+    schedule_preanalysis(stored_clips)
+
+    return {
+        "imported": imported,
+        "skipped": skipped,
+        "duplicates": duplicates,
+        "count": len(imported),
+    }
 
 
 @app.post("/glasses/import-path")
@@ -310,6 +681,8 @@ async def import_glasses_path(payload: ImportPathRequest) -> dict[str, Any]:
 
     imported: list[str] = []
     skipped: list[str] = []
+    duplicates: list[str] = []
+    stored_clips: list[LibraryClip] = []
     max_files = max(1, min(int(payload.max_files), 1000))
 
     iterator = source.rglob("*") if payload.recursive else source.iterdir()
@@ -321,17 +694,129 @@ async def import_glasses_path(payload: ImportPathRequest) -> dict[str, Any]:
         if _safe_suffix(entry.name) not in ALLOWED_CLIP_EXTENSIONS:
             skipped.append(entry.name)
             continue
-        destination = store_library_file(entry)
-        imported.append(destination.name)
+        stored = store_library_file(entry)
+        stored_clips.append(stored)
+        imported.append(stored.name)
+        if stored.duplicate:
+            duplicates.append(stored.name)
+
+    schedule_preanalysis(stored_clips)
 
     return {
         "imported": imported,
         "skipped": skipped,
+        "duplicates": duplicates,
         "count": len(imported),
         "path": str(source),
     }
 
 
+@app.post("/songs")
+async def upload_song(song: UploadFile = File(...)) -> dict[str, Any]:
+    if _safe_suffix(song.filename) not in ALLOWED_SONG_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported song format: {song.filename}")
+    stored = store_song_stream(song.file, song.filename)
+    entry = get_song(stored.song_id) or {}
+    if entry.get("analysis_state") not in {"queued", "analyzing", "ready"}:
+        schedule_song_analysis(stored)
+        entry = get_song(stored.song_id) or entry
+    return {**entry, "duplicate": stored.duplicate}
+
+
+@app.get("/songs")
+async def get_songs() -> dict[str, Any]:
+    return {"items": list_songs()}
+
+
+@app.get("/songs/{song_id}")
+async def get_song_entry(song_id: str) -> dict[str, Any]:
+    entry = get_song(song_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Song not found")
+    return entry
+
+
+def _song_sections(
+    analysis: Optional[SongAnalysis],
+    target_length_s: float,
+    method: str,
+    min_start_s: float,
+    snap: str,
+    top_k: int,
+) -> dict[str, Any]:
+    if analysis is None:
+        raise HTTPException(status_code=409, detail="Song has not been analyzed yet")
+    if method not in SECTION_WEIGHTS:
+        raise HTTPException(
+            status_code=400, detail=f"method must be one of: {', '.join(sorted(SECTION_WEIGHTS))}"
+        )
+    if target_length_s <= 0:
+        raise HTTPException(status_code=400, detail="target_length_s must be positive")
+    options = song_segment_options(
+        analysis,
+        target_length_s,
+        method,
+        max(0.0, min_start_s),
+        snap,
+        analysis.beats_payload(),
+        top_k=max(1, min(top_k, MAX_SONG_SECTIONS)),
+    )
+    return {
+        "duration": analysis.duration,
+        "tempo": analysis.tempo,
+        "sections": [
+            {
+                "start_s": segment.start_s,
+                "end_s": segment.end_s,
+                "loop_audio": segment.loop_audio,
+                "score": candidate.score if candidate else None,
+                "features": candidate.features if candidate else {},
+            }
+            for segment, candidate in options
+        ],
+    }
+
+
+@app.get("/songs/{song_id}/sections")
+async def get_song_sections(
+    song_id: str,
+    target_length_s: float = 15.0,
+    method: str = "auto_score",
+    min_start_s: float = 0.0,
+    snap: str = "downbeat",
+    top_k: int = 5,
+) -> dict[str, Any]:
+    if get_song(song_id) is None:
+        raise HTTPException(status_code=404, detail="Song not found")
+    return _song_sections(load_analysis(song_id), target_length_s, method, min_start_s, snap, top_k)
+
+
+@app.get("/jobs/{job_id}/song-sections")
+async def get_job_song_sections(
+    job_id: str,
+    target_length_s: Optional[float] = None,
+    method: str = "auto_score",
+    min_start_s: float = 0.0,
+    snap: str = "downbeat",
+    top_k: int = 5,
+) -> dict[str, Any]:
+    job_path = get_job_paths(job_id).job_path
+    if not job_path.exists():
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = json.loads(job_path.read_text())
+    song = job.get("song") or {}
+    song_id = song.get("song_id")
+    if not song_id:
+        song_path = Path(song.get("path", ""))
+        if not song_path.is_file():
+            raise HTTPException(status_code=404, detail="Job song not found")
+        song_id = file_sha256(song_path)
+    if target_length_s is None:
+        settings = {**DEFAULT_SETTINGS, **(job.get("settings") or {})}
+        target_length_s = float(settings.get("target_length_s", 15))
+    return _song_sections(load_analysis(song_id), target_length_s, method, min_start_s, snap, top_k)
+
+
 @app.get("/jobs/{job_id}/preview.mp4")
 async def get_preview(job_id: str) -> FileResponse:
     paths = get_job_paths(job_id)
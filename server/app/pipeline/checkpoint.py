@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from app.utils.files import link_or_copy
+from app.utils.status import utc_now_iso
+
+STAGE_ORDER = ["preprocess", "analyze", "beats", "song", "edl", "base", "vhs"]
+
+
+def fingerprint(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+def file_signature(path: Path) -> dict[str, Any]:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class StageManifest:
+    """Per-job record of completed stages and the inputs they were built from.
+
+    A stage is reusable when its recorded fingerprint matches the current one and
+    every output it listed is still on disk. Fingerprints chain through upstream
+    stages, so a changed input invalidates everything downstream of it.
+    """
+
+    def __init__(self, path: Path, stages: Optional[dict[str, dict[str, Any]]] = None) -> None:
+        self.path = path
+        self.stages: dict[str, dict[str, Any]] = stages or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path) -> "StageManifest":
+        try:
+            payload = json.loads(path.read_text())
+        except (OSError, ValueError):
+            payload = {}
+        stages = payload.get("stages") if isinstance(payload, dict) else None
+        return cls(path, stages if isinstance(stages, dict) else {})
+
+    @property
+    def job_dir(self) -> Path:
+        return self.path.parent
+
+    def _outputs(self, stage: str) -> list[Path]:
+        entry = self.stages.get(stage) or {}
+        return [self.job_dir / output for output in entry.get("outputs", [])]
+
+    def _complete(self, stage: str) -> bool:
+        return stage in self.stages and all(path.exists() for path in self._outputs(stage))
+
+    def is_valid(self, stage: str, stage_fingerprint: str) -> bool:
+        entry = self.stages.get(stage)
+        if not entry or entry.get("fingerprint") != stage_fingerprint:
+            return False
+        return self._complete(stage)
+
+    def record(self, stage: str, stage_fingerprint: str, outputs: list[Path]) -> None:
+        with self._lock:
+            self.stages[stage] = {
+                "fingerprint": stage_fingerprint,
+                # Relative paths keep the manifest valid when a derived job
+                # links these outputs into its own directory.
+                "outputs": [str(output.relative_to(self.job_dir)) for output in outputs],
+                "completed_at": utc_now_iso(),
+            }
+            self._save()
+
+    def invalidate(self, stage: str) -> None:
+        """Forget a stage before it is rebuilt.
+
+        Outputs are unlinked rather than overwritten in place because they may be
+        hardlinks shared with the job this one was derived from.
+        """
+        with self._lock:
+            for output in self._outputs(stage):
+                output.unlink(missing_ok=True)
+            if self.stages.pop(stage, None) is not None:
+                self._save()
+
+    def last_good_stage(self) -> Optional[str]:
+        last = None
+        for stage in STAGE_ORDER:
+            if self._complete(stage):
+                last = stage
+        return last
+
+    def link_into(self, job_dir: Path) -> "StageManifest":
+        """Share every completed stage with another job directory via hardlinks."""
+        derived = StageManifest(job_dir / self.path.name)
+        for stage, entry in self.stages.items():
+            if not self._complete(stage):
+                continue
+            for relative in entry.get("outputs", []):
+                link_or_copy(self.job_dir / relative, job_dir / relative)
+            derived.stages[stage] = dict(entry)
+        derived._save()
+        return derived
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps({"stages": self.stages}, indent=2))
+        temp_path.replace(self.path)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Optional
+
+from app.pipeline.checkpoint import StageManifest
+from app.pipeline.runner import load_saved_job, mark_job_failed, run_job, run_saved_job
+from app.utils.concurrency import cpu_count, env_int, threads_per_worker
+from app.utils.files import link_or_copy
+from app.utils.paths import ensure_job_dirs, get_job_paths
+from app.utils.status import report_status
+
+
+def derive_job(
+    parent_id: str,
+    settings_delta: dict[str, Any],
+    source: str = "rerender",
+    job_id: Optional[str] = None,
+) -> str:
+    """Create a job that shares a parent's inputs and finished stages.
+
+    Inputs and stage outputs are hardlinked, so the derived job's run only
+    rebuilds the stages whose fingerprints the settings delta changes.
+    """
+    parent_paths = get_job_paths(parent_id)
+    parent = json.loads(parent_paths.job_path.read_text())
+
+    job_id = job_id or uuid.uuid4().hex
+    paths = ensure_job_dirs(job_id)
+
+    clips: list[dict[str, Any]] = []
+    for item in parent.get("clips", []):
+        source_path = Path(item["path"])
+        destination = paths.input_dir / source_path.name
+        link_or_copy(source_path, destination)
+        clips.append({**item, "path": str(destination)})
+
+    song_source = Path(parent["song"]["path"])
+    song_destination = paths.input_dir / song_source.name
+    link_or_copy(song_source, song_destination)
+
+    settings = {**(parent.get("settings") or {}), **settings_delta}
+    pin_seed = "seed" not in settings_delta and settings.get("seed") is None
+    if pin_seed and parent_paths.edl_path.exists():
+        # Keep the parent's cut unless the caller asked for a new seed.
+        parent_edl = json.loads(parent_paths.edl_path.read_text())
+        settings["seed"] = parent_edl.get("settings", {}).get("seed")
+
+    StageManifest.load(parent_paths.manifest_path).link_into(paths.job_dir)
+
+    payload = {
+        "job_id": job_id,
+        "source": source,
+        "parent_job_id": parent_id,
+        "settings": settings,
+        "clips": clips,
+        "song": {**parent["song"], "path": str(song_destination)},
+    }
+    paths.job_path.write_text(json.dumps(payload, indent=2))
+    return job_id
+
+
+def run_batch(parent_id: str) -> None:
+    """Analyze a batch job once, then render its variants in parallel.
+
+    Every variant is a derived job, so it links the parent's proxies, labels and
+    beats and only builds its own EDL and render.
+    """
+    parent_paths = get_job_paths(parent_id)
+    variants: list[dict[str, Any]] = json.loads(parent_paths.job_path.read_text()).get(
+        "variants", []
+    )
+    clips, song_path, settings, song_id = load_saved_job(parent_id)
+    try:
+        run_job(parent_id, clips, song_path, settings, analysis_only=True, song_id=song_id)
+        for variant in variants:
+            derive_job(parent_id, variant.get("settings") or {}, "variant", variant["job_id"])
+    except Exception as exc:
+        for variant in variants:
+            mark_job_failed(variant["job_id"], exc)
+        raise
+
+    if not variants:
+        report_status(
+            parent_paths.status_path,
+            {
+                "job_id": parent_id,
+                "status": "complete",
+                "step": "done",
+                "progress": 1.0,
+                "message": "Shared analysis ready",
+                "variant_job_ids": [],
+            },
+        )
+        return
+    report_status(
+        parent_paths.status_path,
+        {
+            "job_id": parent_id,
+            "status": "running",
+            "step": "variants",
+            "progress": 0.6,
+            "message": f"Rendering {len(variants)} variants",
+            "variant_job_ids": [variant["job_id"] for variant in variants],
+        },
+    )
+    # Renders are ffmpeg-bound and already multi-threaded, so half the budget
+    # in concurrent variants keeps the machine busy without thrashing.
+    workers = env_int("VARIANT_WORKERS", max(1, min(len(variants), cpu_count() // 2)))
+    # Each render gets its share of the budget rather than every core.
+    threads = threads_per_worker(workers)
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="variant") as pool:
+        futures = {pool.submit(run_saved_job, variant["job_id"], threads): variant for variant in variants}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as exc:
+                failed += 1
+                mark_job_failed(futures[future]["job_id"], exc)
+
+    report_status(
+        parent_paths.status_path,
+        {
+            "job_id": parent_id,
+            "status": "complete" if failed < len(variants) else "error",
+            "step": "done",
+            "progress": 1.0,
+            "message": f"Rendered {len(variants) - failed}/{len(variants)} variants",
+            "variant_job_ids": [variant["job_id"] for variant in variants],
+        },
+    )
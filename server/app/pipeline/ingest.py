@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+import shutil
+
+from app.audio.analysis import analyze_song
+from app.library import LibraryClip, set_analysis_state
+from app.pipeline import jobqueue, label_store, proxy_cache
+from app.pipeline.runner import (
+    DEFAULT_SETTINGS,
+    ProxyClip,
+    encode_proxy,
+    labels_captioned,
+    proxy_spec,
+    tag_clip_frames,
+)
+from app.songs import LibrarySong, resolve_song, set_song_analysis
+from app.utils.concurrency import cpu_count, env_int
+from app.utils.paths import CACHE_DIR
+
+INGEST_WORK_DIR = CACHE_DIR / "ingest"
+
+
+def preanalysis_enabled() -> bool:
+    return os.getenv("LIBRARY_PREANALYZE", "0").lower() in {"1", "true", "yes"}
+
+
+def ingest_threads() -> int:
+    # Background work: stay small so interactive jobs keep the cores.
+    return min(cpu_count(), env_int("INGEST_THREADS", 2))
+
+
+def preanalyze_clip(clip: LibraryClip) -> str:
+    """Build the default proxy and frame labels for a library clip."""
+    spec = proxy_spec(DEFAULT_SETTINGS)
+    key = label_store.label_key(clip.content_hash, spec)
+    if label_store.has_labels(key):
+        set_analysis_state(clip.content_hash, "ready")
+        return "ready"
+
+    set_analysis_state(clip.content_hash, "analyzing")
+    work_dir = INGEST_WORK_DIR / clip.content_hash
+    work_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        proxy_path = work_dir / "proxy.mp4"
+        cache_key = spec.key(clip.content_hash)
+        duration = proxy_cache.fetch_proxy(cache_key, proxy_path)
+        if duration is None:
+            duration = encode_proxy(clip.path, proxy_path, spec, ingest_threads())
+            proxy_cache.store_proxy(cache_key, proxy_path, duration)
+
+        proxy = ProxyClip(
+            clip_id="frame",
+            path=proxy_path,
+            duration=duration,
+            content_hash=clip.content_hash,
+        )
+        labels = tag_clip_frames(proxy, work_dir / "frames")
+        if not labels_captioned(labels):
+            # Heuristic fallbacks are not cached, so a later job or import retries.
+            set_analysis_state(clip.content_hash, "failed")
+            return "failed"
+        label_store.store_labels(key, labels)
+    except Exception:
+        set_analysis_state(clip.content_hash, "failed")
+        raise
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    set_analysis_state(clip.content_hash, "ready")
+    return "ready"
+
+
+def schedule_preanalysis(clips: list[LibraryClip]) -> int:
+    """Queue ingest analysis behind render jobs; returns how many clips were queued."""
+    if not preanalysis_enabled():
+        return 0
+    queued = 0
+    for clip in clips:
+        added = jobqueue.enqueue(
+            f"ingest-{clip.content_hash}",
+            "ingest",
+            {"name": clip.name, "path": str(clip.path), "content_hash": clip.content_hash},
+            priority=jobqueue.PRIORITY_INGEST,
+        )
+        if added:
+            set_analysis_state(clip.content_hash, "queued")
+            queued += 1
+    return queued
+
+
+def analyze_library_song(song_id: str) -> str:
+    """Compute and cache a library song's beat grid and energy curve."""
+    path, _ = resolve_song(song_id)
+    set_song_analysis(song_id, "analyzing")
+    try:
+        analysis = analyze_song(path, content_hash=song_id)
+    except Exception as exc:
+        set_song_analysis(song_id, "failed", error=str(exc) or exc.__class__.__name__)
+        raise
+    set_song_analysis(
+        song_id,
+        "ready",
+        duration=analysis.duration,
+        tempo=analysis.tempo,
+        beat_count=len(analysis.beats),
+    )
+    return "ready"
+
+
+def schedule_song_analysis(song: LibrarySong) -> bool:
+    """Queue a song's analysis; it is short, so it goes ahead of clip ingest."""
+    added = jobqueue.enqueue(
+        f"song-{song.song_id}",
+        "song",
+        {"song_id": song.song_id},
+        priority=jobqueue.PRIORITY_RENDER,
+    )
+    if added:
+        set_song_analysis(song.song_id, "queued")
+    return added
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+from app.utils.concurrency import env_int
+from app.utils.paths import JOBS_DIR
+
+QUEUE_PATH = JOBS_DIR / "queue.sqlite"
+
+PRIORITY_RENDER = 10
+PRIORITY_INGEST = 0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_pid INTEGER,
+    error TEXT,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_pending ON tasks (state, priority, enqueued_at);
+"""
+
+_SCHEMA_LOCK = threading.Lock()
+_SCHEMA_READY = False
+
+
+def max_attempts() -> int:
+    return env_int("JOB_MAX_ATTEMPTS", 3)
+
+
+@dataclass(frozen=True)
+class OrphanedTasks:
+    requeued: list[str]
+    # (task_id, kind) of tasks that reached JOB_MAX_ATTEMPTS and were failed.
+    failed: list[tuple[str, str]]
+
+
+@dataclass(frozen=True)
+class QueuedTask:
+    task_id: str
+    kind: str
+    payload: dict[str, Any]
+    attempts: int
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    global _SCHEMA_READY
+    QUEUE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(QUEUE_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        if not _SCHEMA_READY:
+            with _SCHEMA_LOCK:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _SCHEMA_READY = True
+        yield conn
+    finally:
+        conn.close()
+
+
+def enqueue(
+    task_id: str,
+    kind: str,
+    payload: Optional[dict[str, Any]] = None,
+    priority: int = PRIORITY_RENDER,
+) -> bool:
+    """Queue a task; returns False when the same task is already waiting or running."""
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT state FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        if row is not None and row["state"] in {"queued", "running"}:
+            conn.execute("COMMIT")
+            return False
+        conn.execute(
+            """
+            INSERT INTO tasks (task_id, kind, payload, priority, state, enqueued_at)
+            VALUES (?, ?, ?, ?, 'queued', ?)
+            ON CONFLICT(task_id) DO UPDATE SET
+                kind = excluded.kind,
+                payload = excluded.payload,
+                priority = excluded.priority,
+                state = 'queued',
+                worker_pid = NULL,
+                attempts = 0,
+                error = NULL,
+                enqueued_at = excluded.enqueued_at,
+                started_at = NULL,
+                finished_at = NULL
+            """,
+            (task_id, kind, json.dumps(payload or {}), priority, time.time()),
+        )
+        conn.execute("COMMIT")
+        return True
+
+
+def claim(worker_pid: int) -> Optional[QueuedTask]:
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT task_id, kind, payload, attempts FROM tasks WHERE state = 'queued' "
+            "ORDER BY priority DESC, enqueued_at ASC LIMIT 1"
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE tasks SET state = 'running', worker_pid = ?, started_at = ?, "
+            "attempts = attempts + 1 WHERE task_id = ?",
+            (worker_pid, time.time(), row["task_id"]),
+        )
+        conn.execute("COMMIT")
+    return QueuedTask(
+        task_id=row["task_id"],
+        kind=row["kind"],
+        payload=json.loads(row["payload"]),
+        attempts=int(row["attempts"]) + 1,
+    )
+
+
+def finish(task_id: str, error: Optional[str] = None) -> None:
+    with _connect() as conn:
+        conn.execute(
+            "UPDATE tasks SET state = ?, error = ?, finished_at = ?, worker_pid = NULL "
+            "WHERE task_id = ?",
+            ("failed" if error else "done", error, time.time(), task_id),
+        )
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _release(conn: sqlite3.Connection, rows: list[sqlite3.Row]) -> OrphanedTasks:
+    """Requeue tasks whose worker died, or fail them after too many attempts.
+
+    A task that keeps killing its worker (a crash or the memory limit) would
+    otherwise be retried forever.
+    """
+    limit = max_attempts()
+    requeued = [row["task_id"] for row in rows if int(row["attempts"]) < limit]
+    failed = [(row["task_id"], row["kind"]) for row in rows if int(row["attempts"]) >= limit]
+    conn.executemany(
+        "UPDATE tasks SET state = 'queued', worker_pid = NULL WHERE task_id = ?",
+        [(task_id,) for task_id in requeued],
+    )
+    conn.executemany(
+        "UPDATE tasks SET state = 'failed', worker_pid = NULL, finished_at = ?, error = ? "
+        "WHERE task_id = ?",
+        [(time.time(), f"Worker died {limit} times running this task", task_id) for task_id, _ in failed],
+    )
+    return OrphanedTasks(requeued=requeued, failed=failed)
+
+
+def requeue_orphans() -> OrphanedTasks:
+    """Put tasks whose worker process died back in the queue."""
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            "SELECT task_id, kind, attempts, worker_pid FROM tasks WHERE state = 'running'"
+        ).fetchall()
+        orphans = [
+            row
+            for row in rows
+            if row["worker_pid"] is None or not _pid_alive(int(row["worker_pid"]))
+        ]
+        released = _release(conn, orphans)
+        conn.execute("COMMIT")
+    return released
+
+
+def release_worker(worker_pid: int) -> OrphanedTasks:
+    """Release the tasks of one worker the pool saw exit."""
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            "SELECT task_id, kind, attempts FROM tasks WHERE state = 'running' AND worker_pid = ?",
+            (worker_pid,),
+        ).fetchall()
+        released = _release(conn, rows)
+        conn.execute("COMMIT")
+    return released
+
+
+def queue_position(task_id: str) -> Optional[int]:
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT state, priority, enqueued_at FROM tasks WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        if row is None or row["state"] != "queued":
+            return None
+        ahead = conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE state = 'queued' AND "
+            "(priority > ? OR (priority = ? AND enqueued_at < ?))",
+            (row["priority"], row["priority"], row["enqueued_at"]),
+        ).fetchone()[0]
+    return int(ahead) + 1
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from app.ai.fastvlm import labeler_config
+from app.pipeline.proxy_cache import ProxySpec
+from app.pipeline.sampling import sampling_config
+from app.utils.concurrency import env_int
+from app.utils.paths import CACHE_DIR
+
+LABEL_STORE_PATH = CACHE_DIR / "labels.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS labels_accessed ON labels (accessed_at);
+"""
+
+_SCHEMA_LOCK = threading.Lock()
+_SCHEMA_READY = False
+
+
+def cache_max_bytes() -> int:
+    return env_int("LABEL_CACHE_MAX_MB", 256, minimum=0) * 1024 * 1024
+
+
+def label_key(content_hash: str, spec: ProxySpec) -> str:
+    """Clip content + proxy spec + everything that shapes the labels (model, prefilter, sampling)."""
+    config = json.dumps([labeler_config(), sampling_config()], sort_keys=True)
+    model_tag = hashlib.sha1(config.encode()).hexdigest()[:10]
+    return f"{spec.key(content_hash)}_{model_tag}"
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    global _SCHEMA_READY
+    LABEL_STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(LABEL_STORE_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        if not _SCHEMA_READY:
+            with _SCHEMA_LOCK:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _SCHEMA_READY = True
+        yield conn
+    finally:
+        conn.close()
+
+
+def has_labels(key: str) -> bool:
+    if not cache_max_bytes():
+        return False
+    with _connect() as conn:
+        row = conn.execute("SELECT 1 FROM labels WHERE key = ?", (key,)).fetchone()
+    return row is not None
+
+
+def load_labels(key: str) -> Optional[list[dict[str, Any]]]:
+    if not cache_max_bytes():
+        return None
+    with _connect() as conn:
+        row = conn.execute("SELECT payload FROM labels WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE labels SET accessed_at = ? WHERE key = ?", (time.time(), key))
+    try:
+        payload = json.loads(zlib.decompress(row["payload"]))
+    except (zlib.error, ValueError):
+        return None
+    return payload if isinstance(payload, list) else None
+
+
+def store_labels(key: str, labels: list[dict[str, Any]]) -> None:
+    max_bytes = cache_max_bytes()
+    if not max_bytes:
+        return
+    payload = zlib.compress(json.dumps(labels, separators=(",", ":")).encode(), 6)
+    now = time.time()
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO labels (key, payload, size, frames, created_at, accessed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (key, payload, len(payload), len(labels), now, now),
+        )
+        _evict(conn, max_bytes)
+
+
+def _evict(conn: sqlite3.Connection, max_bytes: int) -> None:
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM labels").fetchone()[0]
+    if total <= max_bytes:
+        return
+    # Least recently used first, down to 90% so every store does not evict.
+    stale: list[str] = []
+    target = int(max_bytes * 0.9)
+    for row in conn.execute("SELECT key, size FROM labels ORDER BY accessed_at"):
+        if total <= target:
+            break
+        stale.append(row["key"])
+        total -= row["size"]
+    conn.executemany("DELETE FROM labels WHERE key = ?", [(key,) for key in stale])
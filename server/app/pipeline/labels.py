@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+LABELS_JSON = "vlm_labels.json"
+LABELS_NPZ = "vlm_labels.npz"
+
+SHOT_TYPES = ["other", "selfie", "closeup", "wide", "pov"]
+NUMERIC_FIELDS = ("timestamp", "highlight", "energy", "people", "brightness")
+DEFAULT_FEATURES = {
+    "highlight": 4,
+    "energy": 4,
+    "people": 0,
+    "brightness": 0.5,
+    "shot_type": "other",
+}
+
+
+def _shot_code(shot_type: str) -> int:
+    try:
+        return SHOT_TYPES.index(shot_type)
+    except ValueError:
+        return 0
+
+
+@dataclass
+class LabelColumns:
+    """One clip's frame labels as parallel arrays, sorted by timestamp.
+
+    Only the fields the timeline scorer reads are kept; captions and tags stay
+    in the JSON export.
+    """
+
+    timestamp: np.ndarray
+    highlight: np.ndarray
+    energy: np.ndarray
+    people: np.ndarray
+    brightness: np.ndarray
+    shot: np.ndarray
+
+    @classmethod
+    def from_records(cls, labels: list[dict[str, Any]]) -> "LabelColumns":
+        ordered = sorted(labels, key=lambda item: float(item["timestamp"]))
+        return cls(
+            timestamp=np.array([float(item["timestamp"]) for item in ordered], dtype=np.float64),
+            highlight=np.array([item.get("highlight", 4) for item in ordered], dtype=np.float64),
+            energy=np.array([item.get("energy", 4) for item in ordered], dtype=np.float64),
+            people=np.array([item.get("people", 0) for item in ordered], dtype=np.int16),
+            brightness=np.array([item.get("brightness", 0.5) for item in ordered], dtype=np.float64),
+            shot=np.array(
+                [_shot_code(item.get("shot_type", "other")) for item in ordered], dtype=np.int8
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def window_features(self, starts: np.ndarray, ends: np.ndarray) -> dict[str, np.ndarray]:
+        """Aggregate features for many [start, end) windows at once.
+
+        Means come from prefix sums over the searchsorted bounds. A window with
+        no labels takes the label nearest its start, and an empty clip takes
+        the defaults.
+        """
+        count = len(starts)
+        if len(self) == 0:
+            return {
+                "highlight": np.full(count, float(DEFAULT_FEATURES["highlight"])),
+                "energy": np.full(count, float(DEFAULT_FEATURES["energy"])),
+                "people": np.zeros(count, dtype=np.int16),
+                "brightness": np.full(count, DEFAULT_FEATURES["brightness"]),
+                "shot": np.zeros(count, dtype=np.int8),
+            }
+
+        lo = np.searchsorted(self.timestamp, starts, side="left")
+        hi = np.searchsorted(self.timestamp, ends, side="left")
+        empty = hi <= lo
+        if empty.any():
+            # Nearest label to the window start; ties go to the earlier one.
+            after = np.clip(lo, 0, len(self) - 1)
+            before = np.clip(lo - 1, 0, len(self) - 1)
+            use_before = np.abs(starts - self.timestamp[before]) <= np.abs(self.timestamp[after] - starts)
+            nearest = np.where(use_before, before, after)
+            # `before` is the last label at its timestamp; take the first one.
+            nearest = np.searchsorted(self.timestamp, self.timestamp[nearest], side="left")
+            lo = np.where(empty, nearest, lo)
+            hi = np.where(empty, nearest + 1, hi)
+        sizes = (hi - lo).astype(np.float64)
+
+        def _mean(values: np.ndarray) -> np.ndarray:
+            prefix = np.concatenate([[0.0], np.cumsum(values)])
+            return (prefix[hi] - prefix[lo]) / sizes
+
+        people = np.empty(count, dtype=np.int16)
+        shot = np.empty(count, dtype=np.int8)
+        for index, (start, stop) in enumerate(zip(lo.tolist(), hi.tolist())):
+            people[index] = self.people[start:stop].max()
+            shot[index] = _mode(self.shot[start:stop])
+        return {
+            "highlight": _mean(self.highlight),
+            "energy": _mean(self.energy),
+            "people": people,
+            "brightness": _mean(self.brightness),
+            "shot": shot,
+        }
+
+    def aggregate(self, start: float, end: float) -> dict[str, Any]:
+        if len(self) == 0:
+            return dict(DEFAULT_FEATURES)
+        features = self.window_features(np.array([start]), np.array([end]))
+        return {
+            "highlight": float(features["highlight"][0]),
+            "energy": float(features["energy"][0]),
+            "people": int(features["people"][0]),
+            "brightness": float(features["brightness"][0]),
+            "shot_type": SHOT_TYPES[int(features["shot"][0])],
+        }
+
+
+def _mode(codes: np.ndarray) -> int:
+    """Most common shot code; ties go to the one that appears first."""
+    counts = np.bincount(codes, minlength=len(SHOT_TYPES))
+    best = np.flatnonzero(counts == counts.max())
+    if len(best) == 1:
+        return int(best[0])
+    return int(codes[np.isin(codes, best)][0])
+
+
+def to_columns(labels: dict[str, list[dict[str, Any]]]) -> dict[str, LabelColumns]:
+    return {clip_id: LabelColumns.from_records(records) for clip_id, records in labels.items()}
+
+
+def write_labels(job_dir: Path, labels: dict[str, list[dict[str, Any]]]) -> list[Path]:
+    """Persist labels as a binary columnar file plus the JSON export."""
+    json_path = job_dir / LABELS_JSON
+    json_path.write_text(json.dumps(labels))
+
+    arrays: dict[str, np.ndarray] = {}
+    for clip_id, columns in to_columns(labels).items():
+        for field in (*NUMERIC_FIELDS, "shot"):
+            arrays[f"{clip_id}.{field}"] = getattr(columns, field)
+    npz_path = job_dir / LABELS_NPZ
+    with npz_path.open("wb") as handle:
+        np.savez(handle, **arrays)
+    return [json_path, npz_path]
+
+
+def load_label_columns(job_dir: Path) -> Optional[dict[str, LabelColumns]]:
+    npz_path = job_dir / LABELS_NPZ
+    if npz_path.exists():
+        with np.load(npz_path) as payload:
+            fields: dict[str, dict[str, np.ndarray]] = {}
+            for key in payload.files:
+                clip_id, _, field = key.rpartition(".")
+                fields.setdefault(clip_id, {})[field] = payload[key]
+        return {clip_id: LabelColumns(**columns) for clip_id, columns in fields.items()}
+
+    # Jobs analyzed before the columnar file existed only have the JSON export.
+    json_path = job_dir / LABELS_JSON
+    if json_path.exists():
+        return to_columns(json.loads(json_path.read_text()))
+    return None
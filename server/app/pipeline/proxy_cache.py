@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from app.utils.concurrency import env_int
+from app.utils.files import link_or_copy
+from app.utils.paths import CACHE_DIR
+
+PROXY_CACHE_DIR = CACHE_DIR / "proxies"
+
+_EVICT_LOCK = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ProxySpec:
+    width: int
+    height: int
+    fps: int
+    crf: int
+
+    def key(self, content_hash: str) -> str:
+        return f"{content_hash}_{self.width}x{self.height}_{self.fps}fps_crf{self.crf}"
+
+
+def cache_max_bytes() -> int:
+    return env_int("PROXY_CACHE_MAX_MB", 20 * 1024, minimum=0) * 1024 * 1024
+
+
+def cache_enabled() -> bool:
+    return cache_max_bytes() > 0
+
+
+def _entry_paths(key: str) -> tuple[Path, Path]:
+    return PROXY_CACHE_DIR / f"{key}.mp4", PROXY_CACHE_DIR / f"{key}.json"
+
+
+def fetch_proxy(key: str, destination: Path) -> Optional[float]:
+    """Link a cached proxy to `destination` and return its duration, or None on a miss."""
+    video_path, meta_path = _entry_paths(key)
+    try:
+        meta = json.loads(meta_path.read_text())
+        link_or_copy(video_path, destination)
+    except (OSError, ValueError):
+        return None
+    # mtime doubles as the LRU clock for eviction.
+    try:
+        os.utime(video_path)
+    except OSError:
+        pass
+    return float(meta["duration"])
+
+
+def store_proxy(key: str, proxy_path: Path, duration: float) -> None:
+    max_bytes = cache_max_bytes()
+    if max_bytes <= 0:
+        return
+    PROXY_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    video_path, meta_path = _entry_paths(key)
+    try:
+        link_or_copy(proxy_path, video_path)
+        temp_meta = meta_path.with_name(f".{meta_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        temp_meta.write_text(json.dumps({"duration": duration}))
+        temp_meta.replace(meta_path)
+    except OSError:
+        return
+    evict(max_bytes)
+
+
+def evict(max_bytes: int) -> int:
+    """Drop least recently used entries until the cache fits in `max_bytes`."""
+    with _EVICT_LOCK:
+        entries: list[tuple[float, int, Path]] = []
+        total = 0
+        for video_path in PROXY_CACHE_DIR.glob("*.mp4"):
+            try:
+                stat = video_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, video_path))
+            total += stat.st_size
+
+        removed = 0
+        for _, size, video_path in sorted(entries):
+            if total <= max_bytes:
+                break
+            video_path.unlink(missing_ok=True)
+            video_path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
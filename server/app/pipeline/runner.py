@@ -1,21 +1,48 @@
 from __future__ import annotations
 
 import json
+import os
 import random
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from bisect import bisect_left
 from pathlib import Path
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterator, Optional
 
-from app.ai.fastvlm import tag_frame
-from app.audio.beat import detect_beats, write_beats
+import numpy as np
+from PIL import Image
+
+from app.ai.fastvlm import batch_size, labeler_config, tag_frames
+from app.audio.analysis import SongAnalysis, analyze_song
+from app.audio.beat import write_beats
 from app.audio.segment import SongSegment, select_song_segment, slice_beats
-from app.utils.ffmpeg import FFmpegError, ffprobe_duration, run_ffmpeg
+from app.pipeline import label_store, proxy_cache, sampling
+from app.pipeline.checkpoint import StageManifest, file_signature, fingerprint
+from app.pipeline.labels import (
+    LABELS_JSON,
+    LABELS_NPZ,
+    SHOT_TYPES,
+    LabelColumns,
+    load_label_columns,
+    to_columns,
+    write_labels,
+)
+from app.pipeline.proxy_cache import ProxySpec
+from app.pipeline.stages import BranchStatus, Stage, run_stages
+from app.utils.concurrency import cpu_count, env_int, prefetch, threads_per_worker
+from app.utils.ffmpeg import (
+    FFmpegError,
+    ffprobe_duration,
+    ffprobe_video_info,
+    iter_raw_frames,
+    run_ffmpeg,
+)
+from app.utils.files import file_sha256
 from app.utils.ntsc import run_ntsc_cli
-from app.utils.paths import JobPaths, ROOT_DIR, ensure_job_dirs
-from app.utils.status import write_status
+from app.utils.paths import JobPaths, ROOT_DIR, ensure_job_dirs, get_job_paths
+from app.utils.status import publish_event, read_status, report_status
 
 
 @dataclass
@@ -23,6 +50,7 @@ class ClipInput:
     clip_id: str
     path: Path
     original_name: str
+    content_hash: Optional[str] = None
 
 
 @dataclass
@@ -30,6 +58,8 @@ class ProxyClip:
     clip_id: str
     path: Path
     duration: float
+    content_hash: Optional[str] = None
+    cache_hit: bool = False
 
 
 DEFAULT_SETTINGS = {
@@ -52,6 +82,9 @@ DEFAULT_SETTINGS = {
     "song_min_start_s": 0.0,
 }
 
+PROXY_FPS = 30
+PROXY_CRF = 28
+
 NTSC_PRESETS = {
     "custom": ROOT_DIR / "presets" / "ntsc" / "ntsc_custom.json",
     "noisy": ROOT_DIR / "presets" / "ntsc" / "ntsc_noisy.json",
@@ -68,7 +101,11 @@ def _resolve_seed(settings: dict[str, Any]) -> int:
 
 
 def _update_status(paths: JobPaths, payload: dict[str, Any]) -> None:
-    write_status(paths.status_path, payload)
+    report_status(paths.status_path, payload)
+
+
+def _announce_artifact(job_id: str, name: str) -> None:
+    publish_event({"type": "artifact", "job_id": job_id, "name": name})
 
 
 def _vibe_segment_base(vibe: str) -> float:
@@ -199,59 +236,209 @@ def _render_dynamic_ntsc(
     return ntsc_path
 
 
+def _proxy_worker_count(clip_count: int) -> int:
+    default = max(1, min(4, cpu_count() // 2))
+    workers = env_int("PROXY_WORKERS", default)
+    return max(1, min(workers, clip_count))
+
+
+def encode_proxy(source: Path, proxy_path: Path, spec: ProxySpec, threads: int) -> float:
+    args = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        str(source),
+        "-vf",
+        (
+            "scale="
+            f"{spec.width}:{spec.height}:force_original_aspect_ratio=increase,"
+            f"crop={spec.width}:{spec.height},setsar=1"
+        ),
+        "-r",
+        str(spec.fps),
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-crf",
+        str(spec.crf),
+        "-threads",
+        str(threads),
+        "-an",
+        str(proxy_path),
+    ]
+    run_ffmpeg(args)
+    return ffprobe_duration(proxy_path)
+
+
+def _build_proxy(
+    clip: ClipInput,
+    proxy_path: Path,
+    spec: ProxySpec,
+    threads: int,
+) -> ProxyClip:
+    if not proxy_cache.cache_enabled():
+        duration = encode_proxy(clip.path, proxy_path, spec, threads)
+        return ProxyClip(
+            clip_id=clip.clip_id,
+            path=proxy_path,
+            duration=duration,
+            content_hash=clip.content_hash,
+        )
+
+    content_hash = clip.content_hash or file_sha256(clip.path)
+    cache_key = spec.key(content_hash)
+    duration = proxy_cache.fetch_proxy(cache_key, proxy_path)
+    if duration is not None:
+        return ProxyClip(
+            clip_id=clip.clip_id,
+            path=proxy_path,
+            duration=duration,
+            content_hash=content_hash,
+            cache_hit=True,
+        )
+
+    duration = encode_proxy(clip.path, proxy_path, spec, threads)
+    proxy_cache.store_proxy(cache_key, proxy_path, duration)
+    return ProxyClip(
+        clip_id=clip.clip_id,
+        path=proxy_path,
+        duration=duration,
+        content_hash=content_hash,
+    )
+
+
+def proxy_spec(settings: dict[str, Any]) -> ProxySpec:
+    width, height = _resolve_resolution(settings)
+    return ProxySpec(width=width, height=height, fps=PROXY_FPS, crf=PROXY_CRF)
+
+
 def preprocess_clips(
     paths: JobPaths,
     clips: list[ClipInput],
     settings: dict[str, Any],
+    max_workers: Optional[int] = None,
 ) -> list[ProxyClip]:
-    proxies: list[ProxyClip] = []
-    target_width, target_height = _resolve_resolution(settings)
-    for clip in clips:
-        proxy_path = paths.proxy_dir / f"{clip.clip_id}.mp4"
-        args = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            str(clip.path),
-            "-vf",
-            (
-                "scale="
-                f"{target_width}:{target_height}:force_original_aspect_ratio=increase,"
-                f"crop={target_width}:{target_height},setsar=1"
-            ),
-            "-r",
-            "30",
-            "-c:v",
-            "libx264",
-            "-preset",
-            "veryfast",
-            "-crf",
-            "28",
-            "-an",
-            str(proxy_path),
+    if not clips:
+        return []
+    spec = proxy_spec(settings)
+    workers = max_workers or _proxy_worker_count(len(clips))
+    threads = threads_per_worker(workers)
+
+    # Each proxy is an independent ffmpeg process, so a thread pool is enough to
+    # keep `workers` encodes in flight; results are collected in input order.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _build_proxy,
+                clip,
+                paths.proxy_dir / f"{clip.clip_id}.mp4",
+                spec,
+                threads,
+            )
+            for clip in clips
         ]
-        run_ffmpeg(args)
-        duration = ffprobe_duration(proxy_path)
-        proxies.append(ProxyClip(clip_id=clip.clip_id, path=proxy_path, duration=duration))
-    return proxies
+        try:
+            return [future.result() for future in futures]
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+FRAME_WIDTH = 384
 
 
-def _extract_frames(proxy: ProxyClip, frames_dir: Path) -> list[Path]:
-    frames_dir.mkdir(parents=True, exist_ok=True)
-    pattern = frames_dir / f"{proxy.clip_id}_%04d.jpg"
+def keep_frames() -> bool:
+    return os.getenv("KEEP_FRAMES", "0").lower() in {"1", "true", "yes"}
+
+
+def _sample_plan(proxy: ProxyClip, width: int, height: int) -> tuple[str, list[float]]:
+    """Filter that picks the frames to tag, and the timestamp of each one.
+
+    An empty timestamp list means fixed-rate sampling at SAMPLE_FPS.
+    """
+    fixed = (f"fps={sampling.SAMPLE_FPS}", [])
+    if sampling.sampling_mode() == "fixed":
+        return fixed
+    motion = sampling.scan_motion(proxy.path, width, height)
+    indices = sampling.choose_sample_indices(motion, sampling.sample_budget(proxy.duration))
+    if not indices:
+        return fixed
+    return sampling.select_filter(indices), [index / sampling.SCAN_FPS for index in indices]
+
+
+def iter_clip_frames(
+    proxy: ProxyClip,
+    frames_dir: Optional[Path] = None,
+) -> Iterator[tuple[float, np.ndarray]]:
+    """Decode sampled frames of a proxy straight into RGB arrays.
+
+    Yields (timestamp, frame). Adaptive sampling (the default) first scans the
+    proxy for motion and samples busy stretches densely and static ones
+    sparsely. With `KEEP_FRAMES=1` each frame is also saved as a JPEG under
+    `frames_dir` for debugging.
+    """
+    info = ffprobe_video_info(proxy.path)
+    if not info.get("width") or not info.get("height"):
+        raise FFmpegError(f"Missing dimensions for {proxy.path}")
+    width, height = sampling.scaled_size(info["width"], info["height"], FRAME_WIDTH)
+    sample_filter, timestamps = _sample_plan(proxy, info["width"], info["height"])
     args = [
         "ffmpeg",
-        "-y",
+        "-v",
+        "error",
         "-i",
         str(proxy.path),
         "-vf",
-        "fps=1,scale=384:-1:flags=lanczos",
-        "-q:v",
-        "2",
-        str(pattern),
+        f"{sample_filter},scale={width}:{height}:flags=lanczos",
+        # rawvideo output defaults to CFR, which would duplicate frames to fill
+        # the gaps between selected ones; pass them through as decoded.
+        "-fps_mode",
+        "passthrough",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgb24",
+        "pipe:1",
     ]
-    run_ffmpeg(args)
-    return sorted(frames_dir.glob(f"{proxy.clip_id}_*.jpg"))
+    save_dir = frames_dir if frames_dir is not None and keep_frames() else None
+    if save_dir is not None:
+        save_dir.mkdir(parents=True, exist_ok=True)
+    for index, frame in enumerate(iter_raw_frames(args, width, height)):
+        if timestamps and index >= len(timestamps):
+            raise FFmpegError(
+                f"ffmpeg returned more than the {len(timestamps)} sampled frames for {proxy.path}"
+            )
+        timestamp = timestamps[index] if timestamps else index / sampling.SAMPLE_FPS
+        if save_dir is not None:
+            Image.fromarray(frame).save(save_dir / f"{proxy.clip_id}_{timestamp:08.2f}.jpg", quality=95)
+        yield timestamp, frame
+
+
+def tag_clip_frames(
+    proxy: ProxyClip,
+    frames_dir: Optional[Path] = None,
+    on_label: Optional[Callable[[dict[str, Any]], None]] = None,
+) -> list[dict[str, Any]]:
+    timestamps: list[float] = []
+
+    def _frames() -> Iterator[np.ndarray]:
+        for timestamp, frame in iter_clip_frames(proxy, frames_dir):
+            timestamps.append(timestamp)
+            yield frame
+
+    def _on_frame(index: int, label: dict[str, Any]) -> None:
+        label["timestamp"] = timestamps[index]
+        if on_label:
+            on_label(label)
+
+    return tag_frames(_frames(), on_label=_on_frame)
+
+
+def labels_captioned(labels: list[dict[str, Any]]) -> bool:
+    """Whether the captioning model produced any of these labels."""
+    return any(label.get("ai_used") for label in labels)
 
 
 def analyze_clips(
@@ -259,40 +446,98 @@ def analyze_clips(
     proxies: list[ProxyClip],
     settings: dict[str, Any],
     status_callback: Optional[Callable[[dict[str, Any]], None]] = None,
+    stats: Optional[dict[str, int]] = None,
 ) -> dict[str, list[dict[str, Any]]]:
+    """Label sampled frames of every clip, reusing the persistent label cache.
+
+    `stats`, when given, receives label cache hits/misses and how many freshly
+    tagged frames were captioned or pre-filtered.
+    """
     labels: dict[str, list[dict[str, Any]]] = {}
     total_est = sum(max(1, int(proxy.duration)) for proxy in proxies) or 1
     processed = 0
+    spec = proxy_spec(settings)
+    stats = stats if stats is not None else {}
+    stats.update(label_hits=0, label_misses=0)
+    # Frames from every clip that needs tagging go through the model together,
+    # so batches stay full across clip boundaries.
+    to_tag: list[ProxyClip] = []
+    store_keys: dict[str, str] = {}
     for proxy in proxies:
-        clip_dir = paths.frames_dir / proxy.clip_id
-        frame_paths = _extract_frames(proxy, clip_dir)
-        clip_labels: list[dict[str, Any]] = []
-        for frame_path in frame_paths:
-            try:
-                index = int(frame_path.stem.split("_")[-1]) - 1
-            except ValueError:
-                index = len(clip_labels)
-            label = tag_frame(frame_path)
-            label["timestamp"] = float(max(0, index))
-            clip_labels.append(label)
-            processed += 1
-            if status_callback and (processed % 2 == 0 or label.get("scene")):
+        # Without a source hash (proxy cache off) the proxy's own bytes identify the frames.
+        content_hash = proxy.content_hash or file_sha256(proxy.path)
+        store_keys[proxy.clip_id] = label_store.label_key(content_hash, spec)
+        stored = label_store.load_labels(store_keys[proxy.clip_id])
+        if stored is not None:
+            stats["label_hits"] += 1
+            labels[proxy.clip_id] = stored
+            processed += len(stored)
+            if status_callback:
                 progress = 0.35 + 0.15 * min(1.0, processed / total_est)
-                caption = label.get("scene") or "no caption"
                 status_callback(
                     {
                         "step": "analyze",
                         "progress": round(progress, 3),
-                        "message": (
-                            f"Tagging {proxy.clip_id} @ {label['timestamp']:.1f}s "
-                            f"({processed}/{total_est}) • {caption}"
-                        ),
+                        "message": f"Reusing cached labels for {proxy.clip_id} ({processed}/{total_est})",
                     }
                 )
-        labels[proxy.clip_id] = clip_labels
+            continue
+
+        stats["label_misses"] += 1
+        labels[proxy.clip_id] = []
+        to_tag.append(proxy)
+
+    pending: list[tuple[str, float]] = []
 
-    labels_path = paths.job_dir / "vlm_labels.json"
-    labels_path.write_text(json.dumps(labels, indent=2))
+    def _decoder(proxy: ProxyClip) -> Callable[[], Iterator[tuple[str, float, np.ndarray]]]:
+        def _decode() -> Iterator[tuple[str, float, np.ndarray]]:
+            for timestamp, frame in iter_clip_frames(proxy, paths.frames_dir / proxy.clip_id):
+                yield proxy.clip_id, timestamp, frame
+
+        return _decode
+
+    def _frames() -> Iterator[np.ndarray]:
+        # Upcoming clips decode on background threads while the model tags; the
+        # bounded queue keeps at most a couple of batches of frames in memory.
+        decoded = prefetch(
+            [_decoder(proxy) for proxy in to_tag],
+            workers=env_int("FRAME_DECODE_WORKERS", 2),
+            maxsize=env_int("FRAME_QUEUE_SIZE", 2 * batch_size()),
+        )
+        for clip_id, timestamp, frame in decoded:
+            pending.append((clip_id, timestamp))
+            yield frame
+
+    def _on_label(index: int, label: dict[str, Any]) -> None:
+        nonlocal processed
+        clip_id, timestamp = pending[index]
+        label["timestamp"] = timestamp
+        labels[clip_id].append(label)
+        processed += 1
+        if status_callback and (processed % 2 == 0 or label.get("scene")):
+            progress = 0.35 + 0.15 * min(1.0, processed / total_est)
+            caption = label.get("scene") or "no caption"
+            status_callback(
+                {
+                    "step": "analyze",
+                    "progress": round(progress, 3),
+                    "message": (
+                        f"Tagging {clip_id} @ {label['timestamp']:.1f}s "
+                        f"({processed}/{total_est}) • {caption}"
+                    ),
+                }
+            )
+
+    tagged = tag_frames(_frames(), on_label=_on_label, clip_of=lambda index: pending[index][0])
+    skipped = sum(1 for label in tagged if label.get("prefilter"))
+    stats["frames_captioned"] = len(tagged) - skipped
+    stats["frames_prefiltered"] = skipped
+    for proxy in to_tag:
+        # Heuristic-only labels would be served as the model's forever; retry next run.
+        if labels_captioned(labels[proxy.clip_id]):
+            label_store.store_labels(store_keys[proxy.clip_id], labels[proxy.clip_id])
+
+    write_labels(paths.job_dir, labels)
     return labels
 
 
@@ -305,41 +550,6 @@ def _candidate_params(vibe: str) -> tuple[float, float]:
     return (0.9, 0.5)
 
 
-def _aggregate_labels(
-    labels: list[dict[str, Any]],
-    start: float,
-    end: float,
-) -> dict[str, Any]:
-    segment = [label for label in labels if start <= label["timestamp"] < end]
-    if not segment and labels:
-        segment = [min(labels, key=lambda item: abs(item["timestamp"] - start))]
-    if not segment:
-        return {
-            "highlight": 4,
-            "energy": 4,
-            "people": 0,
-            "brightness": 0.5,
-            "shot_type": "other",
-        }
-
-    highlight = sum(item.get("highlight", 4) for item in segment) / len(segment)
-    energy = sum(item.get("energy", 4) for item in segment) / len(segment)
-    brightness = sum(item.get("brightness", 0.5) for item in segment) / len(segment)
-    people = max(item.get("people", 0) for item in segment)
-    shot_counts: dict[str, int] = {}
-    for item in segment:
-        shot = item.get("shot_type", "other")
-        shot_counts[shot] = shot_counts.get(shot, 0) + 1
-    shot_type = max(shot_counts, key=shot_counts.get) if shot_counts else "other"
-    return {
-        "highlight": highlight,
-        "energy": energy,
-        "people": people,
-        "brightness": brightness,
-        "shot_type": shot_type,
-    }
-
-
 def _score_candidate(features: dict[str, Any]) -> float:
     highlight = float(features.get("highlight", 4.0)) / 10.0
     energy = float(features.get("energy", 4.0)) / 10.0
@@ -366,7 +576,7 @@ def _overlaps(existing: list[dict[str, Any]], start: float, end: float) -> bool:
 
 def _build_vlm_timeline(
     proxies: list[ProxyClip],
-    labels: dict[str, list[dict[str, Any]]],
+    labels: dict[str, LabelColumns],
     settings: dict[str, Any],
     rng: random.Random,
 ) -> list[dict[str, Any]]:
@@ -376,23 +586,34 @@ def _build_vlm_timeline(
 
     candidates: list[dict[str, Any]] = []
     for proxy in proxies:
-        clip_labels = labels.get(proxy.clip_id, [])
+        clip_labels = labels.get(proxy.clip_id) or LabelColumns.from_records([])
+        starts: list[float] = []
         start = 0.0
         while start + seg_len <= proxy.duration + 0.01:
-            end = min(proxy.duration, start + seg_len)
-            features = _aggregate_labels(clip_labels, start, end)
-            score = _score_candidate(features)
+            starts.append(start)
+            start += stride
+        if not starts:
+            continue
+        ends = [min(proxy.duration, value + seg_len) for value in starts]
+        # Every candidate window of the clip is aggregated in one vectorized pass.
+        features = clip_labels.window_features(np.array(starts), np.array(ends))
+        for index, (start, end) in enumerate(zip(starts, ends)):
+            window = {
+                "highlight": features["highlight"][index],
+                "energy": features["energy"][index],
+                "people": int(features["people"][index]),
+                "brightness": features["brightness"][index],
+            }
             candidates.append(
                 {
                     "clip_id": proxy.clip_id,
                     "in": round(start, 3),
                     "out": round(end, 3),
-                    "score": score,
-                    "shot_type": features.get("shot_type", "other"),
-                    "people": features.get("people", 0),
+                    "score": _score_candidate(window),
+                    "shot_type": SHOT_TYPES[int(features["shot"][index])],
+                    "people": window["people"],
                 }
             )
-            start += stride
 
     candidates.sort(key=lambda item: item["score"], reverse=True)
     if not candidates:
@@ -587,7 +808,7 @@ def build_edl(
     paths: JobPaths,
     proxies: list[ProxyClip],
     settings: dict[str, Any],
-    labels: Optional[dict[str, list[dict[str, Any]]]] = None,
+    labels: Optional[dict[str, LabelColumns]] = None,
     beats: Optional[dict[str, Any]] = None,
     song_segment: Optional[SongSegment] = None,
 ) -> dict[str, Any]:
@@ -610,13 +831,7 @@ def build_edl(
 
     segment_payload = None
     if song_segment is not None:
-        segment_payload = {
-            "start_s": song_segment.start_s,
-            "end_s": song_segment.end_s,
-            "method": song_segment.method,
-            "snap": song_segment.snap,
-            "loop_audio": song_segment.loop_audio,
-        }
+        segment_payload = _segment_payload(song_segment)
 
     edl = {
         "version": "0.1",
@@ -825,13 +1040,18 @@ def _resolve_resolution(settings: dict[str, Any]) -> tuple[int, int]:
     return (1080, 1920)
 
 
-def render_reel(
+def _thread_args(threads: Optional[int]) -> list[str]:
+    return ["-threads", str(threads)] if threads else []
+
+
+def render_base(
     paths: JobPaths,
     proxies: list[ProxyClip],
     edl: dict[str, Any],
     song_path: Path,
     settings: dict[str, Any],
-) -> dict[str, Path]:
+    threads: Optional[int] = None,
+) -> Path:
     timeline = edl["timeline"]
     if not timeline:
         raise RuntimeError("Empty timeline")
@@ -918,10 +1138,23 @@ def render_reel(
         "192k",
         "-movflags",
         "+faststart",
+        *_thread_args(threads),
         "-shortest",
         str(base_path),
     ]
     run_ffmpeg(args_base)
+    return base_path
+
+
+def render_vhs(
+    paths: JobPaths,
+    base_path: Path,
+    edl: dict[str, Any],
+    settings: dict[str, Any],
+    threads: Optional[int] = None,
+) -> dict[str, Path]:
+    width, height = _resolve_resolution(settings)
+    target_length = float(edl["settings"]["target_length_s"])
 
     final_path = paths.output_dir / "final.mp4"
     vhs_engine = str(settings.get("vhs_engine", "ntsc-rs")).lower()
@@ -956,6 +1189,7 @@ def render_reel(
                     "copy",
                     "-movflags",
                     "+faststart",
+                    *_thread_args(threads),
                     "-shortest",
                     str(final_path),
                 ]
@@ -985,6 +1219,7 @@ def render_reel(
                     "192k",
                     "-movflags",
                     "+faststart",
+                    *_thread_args(threads),
                     "-shortest",
                     str(final_path),
                 ]
@@ -1009,6 +1244,7 @@ def render_reel(
                 "copy",
                 "-movflags",
                 "+faststart",
+                *_thread_args(threads),
                 "-shortest",
                 str(final_path),
             ]
@@ -1036,6 +1272,7 @@ def render_reel(
         "128k",
         "-movflags",
         "+faststart",
+        *_thread_args(threads),
         str(preview_path),
     ]
     run_ffmpeg(args_preview)
@@ -1043,142 +1280,378 @@ def render_reel(
     return {"final": final_path, "preview": preview_path}
 
 
-def run_job(job_id: str, clips: list[ClipInput], song_path: Path, settings: dict[str, Any]) -> None:
-    paths = ensure_job_dirs(job_id)
-    settings = {**DEFAULT_SETTINGS, **settings}
+def render_reel(
+    paths: JobPaths,
+    proxies: list[ProxyClip],
+    edl: dict[str, Any],
+    song_path: Path,
+    settings: dict[str, Any],
+) -> dict[str, Path]:
+    base_path = render_base(paths, proxies, edl, song_path, settings)
+    return render_vhs(paths, base_path, edl, settings)
 
-    _update_status(
-        paths,
-        {
-            "job_id": job_id,
-            "status": "running",
-            "step": "preprocess",
-            "progress": 0.1,
-            "message": "Generating proxies",
-        },
+
+def _write_proxies(paths: JobPaths, proxies: list[ProxyClip]) -> Path:
+    proxies_path = paths.job_dir / "proxies.json"
+    proxies_path.write_text(
+        json.dumps(
+            [
+                {
+                    "clip_id": proxy.clip_id,
+                    "path": str(proxy.path),
+                    "duration": proxy.duration,
+                    "content_hash": proxy.content_hash,
+                }
+                for proxy in proxies
+            ],
+            indent=2,
+        )
     )
+    return proxies_path
 
-    try:
-        proxies = preprocess_clips(paths, clips, settings)
 
-        _update_status(
-            paths,
-            {
-                "job_id": job_id,
-                "status": "running",
-                "step": "analyze",
-                "progress": 0.35,
-                "message": "Tagging frames (FastVLM)",
-            },
+def _read_proxies(paths: JobPaths) -> list[ProxyClip]:
+    payload = json.loads((paths.job_dir / "proxies.json").read_text())
+    return [
+        ProxyClip(
+            clip_id=item["clip_id"],
+            path=paths.proxy_dir / Path(item["path"]).name,
+            duration=float(item["duration"]),
+            content_hash=item.get("content_hash"),
         )
+        for item in payload
+    ]
 
-        labels: Optional[dict[str, list[dict[str, Any]]]] = None
-        try:
-            def _status_update(update: dict[str, Any]) -> None:
-                _update_status(
-                    paths,
-                    {
-                        "job_id": job_id,
-                        "status": "running",
-                        **update,
-                    },
-                )
 
-            labels = analyze_clips(paths, proxies, settings, _status_update)
-        except Exception as exc:
-            _update_status(
-                paths,
+def _segment_payload(segment: SongSegment) -> dict[str, Any]:
+    return {
+        "start_s": segment.start_s,
+        "end_s": segment.end_s,
+        "method": segment.method,
+        "snap": segment.snap,
+        "loop_audio": segment.loop_audio,
+    }
+
+
+def _clip_fingerprint(clip: ClipInput) -> dict[str, Any]:
+    if clip.content_hash:
+        return {"clip_id": clip.clip_id, "content_hash": clip.content_hash}
+    return {"clip_id": clip.clip_id, **file_signature(clip.path)}
+
+
+def _setting_values(settings: dict[str, Any], keys: list[str]) -> dict[str, Any]:
+    return {key: settings.get(key) for key in keys}
+
+
+EDL_SETTING_KEYS = [
+    "target_length_s",
+    "vibe",
+    "seed",
+    "resolution",
+    "fps",
+    "vhs_intensity",
+    "glitch_amount",
+    "grain_amount",
+]
+SONG_SETTING_KEYS = [
+    "target_length_s",
+    "song_section",
+    "song_start_s",
+    "song_min_start_s",
+    "song_snap",
+]
+BASE_SETTING_KEYS = [
+    "resolution",
+    "fps",
+    "vhs_overlay",
+]
+VHS_SETTING_KEYS = [
+    "vhs_engine",
+    "ntsc_preset",
+    "vhs_intensity",
+]
+
+
+def run_job(
+    job_id: str,
+    clips: list[ClipInput],
+    song_path: Path,
+    settings: dict[str, Any],
+    analysis_only: bool = False,
+    song_id: Optional[str] = None,
+    render_threads: Optional[int] = None,
+) -> None:
+    """Run or resume a job's stages.
+
+    `analysis_only` stops after the shared stages and leaves the job running for
+    the caller to finish; `render_threads` caps ffmpeg threads per render.
+    """
+    paths = ensure_job_dirs(job_id)
+    settings = {**DEFAULT_SETTINGS, **settings}
+    manifest = StageManifest.load(paths.manifest_path)
+    cache_stats: dict[str, int] = {}
+
+    def _status_update(update: dict[str, Any]) -> None:
+        payload: dict[str, Any] = {"job_id": job_id, "status": "running", **update}
+        if cache_stats:
+            payload["cache"] = dict(cache_stats)
+        _update_status(paths, payload)
+
+    status = BranchStatus(_status_update, side=("song",))
+
+    def _preprocess(inputs: dict[str, Any]) -> tuple[str, list[ProxyClip]]:
+        update = status.branch("clips")
+        preprocess_fp = fingerprint(
+            "preprocess",
+            [_clip_fingerprint(clip) for clip in clips],
+            asdict(proxy_spec(settings)),
+        )
+        if manifest.is_valid("preprocess", preprocess_fp):
+            proxies = _read_proxies(paths)
+            update(
+                {
+                    "step": "preprocess",
+                    "progress": 0.3,
+                    "message": "Reusing proxies from a previous run",
+                }
+            )
+        else:
+            update(
+                {
+                    "step": "preprocess",
+                    "progress": 0.1,
+                    "message": "Generating proxies",
+                }
+            )
+            manifest.invalidate("preprocess")
+            proxies = preprocess_clips(paths, clips, settings)
+            proxy_hits = sum(1 for proxy in proxies if proxy.cache_hit)
+            cache_stats["proxy_hits"] = proxy_hits
+            cache_stats["proxy_misses"] = len(proxies) - proxy_hits
+            proxies_path = _write_proxies(paths, proxies)
+            manifest.record(
+                "preprocess",
+                preprocess_fp,
+                [proxies_path, *(proxy.path for proxy in proxies)],
+            )
+        return preprocess_fp, proxies
+
+    def _analyze(inputs: dict[str, Any]) -> tuple[str, Optional[dict[str, LabelColumns]]]:
+        update = status.branch("clips")
+        preprocess_fp, proxies = inputs["preprocess"]
+        labels: Optional[dict[str, LabelColumns]] = None
+        analyze_fp = fingerprint(
+            "analyze", preprocess_fp, labeler_config(), sampling.sampling_config()
+        )
+        if manifest.is_valid("analyze", analyze_fp):
+            labels = load_label_columns(paths.job_dir)
+            update(
                 {
-                    "job_id": job_id,
-                    "status": "running",
                     "step": "analyze",
-                    "progress": 0.4,
-                    "message": f"Tagging failed, falling back: {exc}",
-                },
+                    "progress": 0.45,
+                    "message": "Reusing frame tags from a previous run",
+                }
+            )
+        else:
+            update(
+                {
+                    "step": "analyze",
+                    "progress": 0.35,
+                    "message": "Tagging frames (FastVLM)",
+                }
             )
-            labels = None
+            manifest.invalidate("analyze")
+            try:
+                records = analyze_clips(paths, proxies, settings, update, cache_stats)
+                labels = to_columns(records)
+                manifest.record(
+                    "analyze",
+                    analyze_fp,
+                    [paths.job_dir / LABELS_JSON, paths.job_dir / LABELS_NPZ],
+                )
+            except Exception as exc:
+                update(
+                    {
+                        "step": "analyze",
+                        "progress": 0.4,
+                        "message": f"Tagging failed, falling back: {exc}",
+                    }
+                )
+                labels = None
+                analyze_fp = fingerprint("analyze", "fallback")
+        return analyze_fp, labels
 
-        _update_status(
-            paths,
+    def _song(inputs: dict[str, Any]) -> tuple[str, Optional[SongSegment], Optional[dict[str, Any]]]:
+        update = status.branch("song")
+        update(
             {
-                "job_id": job_id,
-                "status": "running",
                 "step": "song",
                 "progress": 0.48,
                 "message": "Selecting best song segment",
-            },
+            }
         )
-
-        beats_full = None
-        segment: Optional[SongSegment] = None
-        beats = None
         try:
-            beats_full = detect_beats(song_path)
-            target_length = float(settings.get("target_length_s", 15))
-            song_section = settings.get("song_section", "auto_energy")
-            song_start = settings.get("song_start_s")
-            song_min_start = float(settings.get("song_min_start_s", 0.0))
-            song_snap = settings.get("song_snap", "downbeat")
-            if song_section == "manual" and song_start is not None:
-                song_min_start = float(song_start)
-
-            segment = select_song_segment(
-                song_path=song_path,
-                target_length_s=target_length,
-                method=song_section,
-                min_start_s=song_min_start,
-                snap_to=song_snap,
-                beats_full=beats_full,
-            )
-            beats = slice_beats(beats_full, segment.start_s, segment.end_s)
-            write_beats(paths.job_dir / "beats.json", beats)
-            _update_status(
-                paths,
+            # Decoded once per distinct song file; later stages and jobs hit the
+            # cache. A library song's id is its content hash, so it is not re-hashed.
+            analysis: Optional[SongAnalysis] = None
+            beats_full_path = paths.job_dir / "beats_full.json"
+            beats_fp = fingerprint("beats", file_signature(song_path))
+            if manifest.is_valid("beats", beats_fp):
+                beats_full = json.loads(beats_full_path.read_text())
+            else:
+                manifest.invalidate("beats")
+                analysis = analyze_song(song_path, content_hash=song_id)
+                beats_full = analysis.beats_payload()
+                write_beats(beats_full_path, beats_full)
+                manifest.record("beats", beats_fp, [beats_full_path])
+
+            beats_path = paths.job_dir / "beats.json"
+            segment_path = paths.job_dir / "song_segment.json"
+            song_fp = fingerprint("song", beats_fp, _setting_values(settings, SONG_SETTING_KEYS))
+            if manifest.is_valid("song", song_fp):
+                segment = SongSegment(**json.loads(segment_path.read_text()))
+                beats = json.loads(beats_path.read_text())
+            else:
+                manifest.invalidate("song")
+                target_length = float(settings.get("target_length_s", 15))
+                song_section = settings.get("song_section", "auto_energy")
+                song_start = settings.get("song_start_s")
+                song_min_start = float(settings.get("song_min_start_s", 0.0))
+                song_snap = settings.get("song_snap", "downbeat")
+                if song_section == "manual" and song_start is not None:
+                    song_min_start = float(song_start)
+
+                segment = select_song_segment(
+                    song_path=song_path,
+                    target_length_s=target_length,
+                    method=song_section,
+                    min_start_s=song_min_start,
+                    snap_to=song_snap,
+                    beats_full=beats_full,
+                    analysis=analysis or analyze_song(song_path, content_hash=song_id),
+                )
+                beats = slice_beats(beats_full, segment.start_s, segment.end_s)
+                write_beats(beats_path, beats)
+                segment_path.write_text(json.dumps(_segment_payload(segment), indent=2))
+                manifest.record("song", song_fp, [beats_path, segment_path])
+            update(
                 {
-                    "job_id": job_id,
-                    "status": "running",
                     "step": "song",
                     "progress": 0.52,
                     "message": f"Using song segment {segment.start_s:.2f}s–{segment.end_s:.2f}s",
-                },
+                }
             )
+            return song_fp, segment, beats
         except Exception as exc:
-            _update_status(
-                paths,
+            update(
                 {
-                    "job_id": job_id,
-                    "status": "running",
                     "step": "song",
                     "progress": 0.52,
                     "message": f"Song segment selection failed, continuing: {exc}",
-                },
+                }
             )
+            return fingerprint("song", "none"), None, None
 
-        _update_status(
-            paths,
-            {
-                "job_id": job_id,
-                "status": "running",
-                "step": "edl",
-                "progress": 0.6,
-                "message": "Building edit decision list",
-            },
+    try:
+        # Song analysis does not depend on the clips, so it runs alongside
+        # preprocessing and tagging; everything after the EDL is a plain chain.
+        results = run_stages(
+            [
+                Stage("preprocess", _preprocess),
+                Stage("analyze", _analyze, after=("preprocess",)),
+                Stage("song", _song),
+            ],
+            workers=env_int("JOB_STAGE_WORKERS", 2),
         )
+        preprocess_fp, proxies = results["preprocess"]
+        analyze_fp, labels = results["analyze"]
+        song_fp, segment, beats = results["song"]
 
-        edl = build_edl(paths, proxies, settings, labels, beats, segment)
-
-        _update_status(
-            paths,
+        if analysis_only:
+            _update_status(
+                paths,
+                {
+                    "job_id": job_id,
+                    "status": "running",
+                    "step": "analysis",
+                    "progress": 0.55,
+                    "message": "Shared analysis ready",
+                    "cache": dict(cache_stats),
+                },
+            )
+            return
+
+        edl_fp = fingerprint(
+            "edl",
+            preprocess_fp,
+            analyze_fp,
+            song_fp,
+            _setting_values(settings, EDL_SETTING_KEYS),
+        )
+        if manifest.is_valid("edl", edl_fp):
+            edl = json.loads(paths.edl_path.read_text())
+        else:
+            status.update(
+                "edit",
+                {
+                    "step": "edl",
+                    "progress": 0.6,
+                    "message": "Building edit decision list",
+                }
+            )
+            manifest.invalidate("edl")
+            edl = build_edl(paths, proxies, settings, labels, beats, segment)
+            manifest.record("edl", edl_fp, [paths.edl_path])
+        _announce_artifact(job_id, "edl")
+
+        base_path = paths.output_dir / "base.mp4"
+        # Keyed on the cut itself rather than edl_fp, so settings that only touch
+        # EDL metadata (effect amounts) do not force a new base render.
+        base_fp = fingerprint(
+            "base",
             {
-                "job_id": job_id,
-                "status": "running",
-                "step": "render",
-                "progress": 0.72,
-                "message": "Rendering reel",
+                "timeline": edl.get("timeline"),
+                "target_length_s": edl.get("settings", {}).get("target_length_s"),
+                "seed": edl.get("settings", {}).get("seed"),
+                "song_segment": edl.get("settings", {}).get("song_segment"),
             },
+            file_signature(song_path),
+            _setting_values(settings, BASE_SETTING_KEYS),
         )
+        if not manifest.is_valid("base", base_fp):
+            status.update(
+                "edit",
+                {
+                    "step": "render",
+                    "progress": 0.72,
+                    "message": "Rendering reel",
+                }
+            )
+            manifest.invalidate("base")
+            base_path = render_base(
+                paths, proxies, edl, song_path, settings, threads=render_threads
+            )
+            manifest.record("base", base_fp, [base_path])
 
-        outputs = render_reel(paths, proxies, edl, song_path, settings)
+        outputs = {
+            "final": paths.output_dir / "final.mp4",
+            "preview": paths.output_dir / "preview.mp4",
+        }
+        vhs_fp = fingerprint("vhs", base_fp, _setting_values(settings, VHS_SETTING_KEYS))
+        if not manifest.is_valid("vhs", vhs_fp):
+            status.update(
+                "edit",
+                {
+                    "step": "render",
+                    "progress": 0.86,
+                    "message": "Applying VHS pass",
+                }
+            )
+            manifest.invalidate("vhs")
+            outputs = render_vhs(paths, base_path, edl, settings, threads=render_threads)
+            manifest.record("vhs", vhs_fp, [outputs["final"], outputs["preview"]])
+        _announce_artifact(job_id, "final")
+        _announce_artifact(job_id, "preview")
 
         _update_status(
             paths,
@@ -1188,6 +1661,7 @@ def run_job(job_id: str, clips: list[ClipInput], song_path: Path, settings: dict
                 "step": "done",
                 "progress": 1.0,
                 "message": "Ready",
+                "cache": dict(cache_stats),
                 "artifacts": {
                     "preview": str(outputs["preview"]),
                     "final": str(outputs["final"]),
@@ -1204,6 +1678,47 @@ def run_job(job_id: str, clips: list[ClipInput], song_path: Path, settings: dict
                 "step": "failed",
                 "progress": 1.0,
                 "message": str(exc),
+                "last_good_stage": manifest.last_good_stage(),
             },
         )
         raise
+
+
+def load_saved_job(
+    job_id: str,
+) -> tuple[list[ClipInput], Path, dict[str, Any], Optional[str]]:
+    payload = json.loads(get_job_paths(job_id).job_path.read_text())
+    clips = [
+        ClipInput(
+            clip_id=item["clip_id"],
+            path=Path(item["path"]),
+            original_name=item.get("filename") or item["clip_id"],
+            content_hash=item.get("content_hash"),
+        )
+        for item in payload.get("clips", [])
+    ]
+    song_path = Path(payload["song"]["path"])
+    song_id = payload["song"].get("song_id")
+    return clips, song_path, payload.get("settings") or {}, song_id
+
+
+def run_saved_job(job_id: str, render_threads: Optional[int] = None) -> None:
+    clips, song_path, settings, song_id = load_saved_job(job_id)
+    run_job(job_id, clips, song_path, settings, song_id=song_id, render_threads=render_threads)
+
+
+def mark_job_failed(job_id: str, exc: BaseException) -> None:
+    status_path = get_job_paths(job_id).status_path
+    status = read_status(status_path) or {}
+    if status.get("status") == "error":
+        return
+    report_status(
+        status_path,
+        {
+            "job_id": job_id,
+            "status": "error",
+            "step": "failed",
+            "progress": 1.0,
+            "message": str(exc) or exc.__class__.__name__,
+        },
+    )
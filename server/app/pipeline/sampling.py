@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import math
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.utils.concurrency import env_int
+from app.utils.ffmpeg import iter_raw_frames
+
+# Sample times are picked from a grid of SCAN_FPS candidates per second, scored
+# by frame differences on a tiny grayscale decode.
+SCAN_FPS = 4
+SCAN_WIDTH = 64
+SAMPLE_FPS = 1
+MAX_GAP_S = 3.0
+MOTION_FLOOR = 0.35
+
+
+def sampling_mode() -> str:
+    mode = os.getenv("FRAME_SAMPLING", "adaptive").lower()
+    return mode if mode in {"adaptive", "fixed"} else "adaptive"
+
+
+def max_frames() -> int:
+    return env_int("SAMPLE_MAX_FRAMES", 120)
+
+
+def sampling_config() -> dict[str, Any]:
+    mode = sampling_mode()
+    if mode == "fixed":
+        return {"mode": mode, "fps": SAMPLE_FPS}
+    return {
+        "mode": mode,
+        "scan_fps": SCAN_FPS,
+        "fps": SAMPLE_FPS,
+        "max_gap_s": MAX_GAP_S,
+        "floor": MOTION_FLOOR,
+        "max_frames": max_frames(),
+    }
+
+
+def scaled_size(width: int, height: int, target_width: int) -> tuple[int, int]:
+    return target_width, max(2, round(target_width * height / width / 2) * 2)
+
+
+def scan_motion(path: Path, width: int, height: int) -> np.ndarray:
+    """Mean absolute difference from the previous candidate frame, in [0, 1].
+
+    One entry per candidate at SCAN_FPS; the first is 0.
+    """
+    scan_width, scan_height = scaled_size(width, height, SCAN_WIDTH)
+    args = [
+        "ffmpeg",
+        "-v",
+        "error",
+        "-i",
+        str(path),
+        "-vf",
+        f"fps={SCAN_FPS},scale={scan_width}:{scan_height}:flags=area",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "gray",
+        "pipe:1",
+    ]
+    frames = [
+        frame.astype(np.int16)
+        for frame in iter_raw_frames(args, scan_width, scan_height, channels=1)
+    ]
+    if not frames:
+        return np.zeros(0, dtype=np.float32)
+    stack = np.stack(frames)
+    motion = np.zeros(len(frames), dtype=np.float32)
+    motion[1:] = np.abs(np.diff(stack, axis=0)).mean(axis=(1, 2)) / 255.0
+    return motion
+
+
+def _weighted_picks(weights: np.ndarray, picks: int) -> np.ndarray:
+    cumulative = np.cumsum(weights)
+    targets = (np.arange(picks) + 0.5) * cumulative[-1] / picks
+    return np.unique(np.clip(np.searchsorted(cumulative, targets), 0, len(weights) - 1))
+
+
+def _fill_gaps(indices: np.ndarray, count: int, max_gap: int) -> list[int]:
+    bounded: list[int] = []
+    previous = -1
+    for index in [*indices.tolist(), count - 1 + max_gap]:
+        while index - previous > max_gap:
+            previous += max_gap
+            if previous < count:
+                bounded.append(previous)
+        if index < count and index != previous:
+            bounded.append(index)
+            previous = index
+    return bounded
+
+
+def choose_sample_indices(motion: np.ndarray, budget: int) -> list[int]:
+    """Spread at most `budget` samples over the candidates, denser where motion is high.
+
+    Every candidate gets a weight of MOTION_FLOOR plus its motion relative to
+    the clip average; samples sit at even steps of the cumulative weight. Gaps
+    longer than MAX_GAP_S are then split so static stretches still get labels.
+    The gap fills count against the budget: the weighted picks shrink until
+    both fit. If the budget cannot cover every gap, samples are spread evenly.
+    """
+    count = len(motion)
+    if count == 0:
+        return []
+    if count <= budget:
+        return list(range(count))
+
+    weights = MOTION_FLOOR + motion / (float(motion.mean()) + 1e-6)
+    max_gap = max(1, int(MAX_GAP_S * SCAN_FPS))
+    picks = budget
+    while picks > 0:
+        bounded = _fill_gaps(_weighted_picks(weights, picks), count, max_gap)
+        if len(bounded) <= budget:
+            return bounded
+        picks -= len(bounded) - budget
+    return np.unique(np.linspace(0, count - 1, budget).round().astype(int)).tolist()
+
+
+def sample_budget(duration: float) -> int:
+    return max(1, min(max_frames(), math.ceil(duration * SAMPLE_FPS)))
+
+
+def select_filter(indices: list[int]) -> str:
+    """ffmpeg filter that keeps the given candidate indices at SCAN_FPS."""
+    terms = "+".join(f"eq(n\\,{index})" for index in indices)
+    return f"fps={SCAN_FPS},select={terms}"
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of a job. `run` receives the results of the stages it comes `after`."""
+
+    name: str
+    run: Callable[[dict[str, Any]], Any]
+    after: tuple[str, ...] = ()
+
+
+def run_stages(stages: Sequence[Stage], workers: int) -> dict[str, Any]:
+    """Run every stage as soon as the stages it depends on are done.
+
+    Independent stages run concurrently on up to `workers` threads. After the
+    first failure no new stage starts; running ones finish, then the error is
+    raised. Returns each stage's result by name.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        unknown = [name for name in stage.after if name not in by_name]
+        if unknown:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {unknown}")
+
+    results: dict[str, Any] = {}
+    waiting = dict(by_name)
+    running: dict[Future, str] = {}
+    error: Optional[BaseException] = None
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="stage") as pool:
+        while waiting or running:
+            if error is None:
+                for name, stage in list(waiting.items()):
+                    if all(dependency in results for dependency in stage.after):
+                        del waiting[name]
+                        inputs = {dependency: results[dependency] for dependency in stage.after}
+                        running[pool.submit(stage.run, inputs)] = name
+            if not running:
+                if error is None:
+                    raise ValueError(f"Stage dependencies form a cycle: {sorted(waiting)}")
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except BaseException as exc:
+                    if error is None:
+                        error = exc
+    if error is not None:
+        raise error
+    return results
+
+
+class BranchStatus:
+    """Merges status updates from the concurrent branches of one job.
+
+    Every update carries each branch's latest step, progress and message under
+    `branches`. The top-level step and message follow the latest update, but
+    `side` branches do not move the top-level progress, so a short branch that
+    finishes early does not make the job look further along than it is.
+    """
+
+    def __init__(self, report: Callable[[dict[str, Any]], None], side: Iterable[str] = ()) -> None:
+        self._report = report
+        self._side = set(side)
+        self._branches: dict[str, dict[str, Any]] = {}
+        self._progress = 0.0
+        self._lock = threading.Lock()
+
+    def branch(self, name: str) -> Callable[[dict[str, Any]], None]:
+        return lambda update: self.update(name, update)
+
+    def update(self, branch: str, update: dict[str, Any]) -> None:
+        with self._lock:
+            self._branches[branch] = {
+                key: update[key] for key in ("step", "progress", "message") if key in update
+            }
+            if branch not in self._side and "progress" in update:
+                self._progress = max(self._progress, float(update["progress"]))
+            payload = {
+                **update,
+                "progress": self._progress,
+                "branches": {name: dict(entry) for name, entry in self._branches.items()},
+            }
+            # Reported under the lock so listeners see branch updates in order.
+            self._report(payload)
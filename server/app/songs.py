@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional
+
+from app.utils.files import copy_and_hash
+from app.utils.paths import ROOT_DIR
+
+SONGS_DIR = ROOT_DIR / "library" / "songs"
+SONG_INDEX_PATH = ROOT_DIR / "library" / "songs.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS songs (
+    song_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    suffix TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    duration REAL,
+    tempo REAL,
+    beat_count INTEGER,
+    analysis_state TEXT NOT NULL DEFAULT 'none',
+    error TEXT
+);
+"""
+
+_SCHEMA_LOCK = threading.Lock()
+_SCHEMA_READY = False
+
+
+@dataclass(frozen=True)
+class LibrarySong:
+    song_id: str
+    filename: str
+    path: Path
+    duplicate: bool = False
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    global _SCHEMA_READY
+    SONG_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(SONG_INDEX_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        if not _SCHEMA_READY:
+            with _SCHEMA_LOCK:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _SCHEMA_READY = True
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def song_path(song_id: str, suffix: str) -> Path:
+    return SONGS_DIR / f"{song_id}{suffix}"
+
+
+def store_song_stream(stream: BinaryIO, filename: Optional[str]) -> LibrarySong:
+    """Store an uploaded song under its content hash; identical uploads share one entry."""
+    SONGS_DIR.mkdir(parents=True, exist_ok=True)
+    filename = Path(filename or "").name or "song"
+    suffix = Path(filename).suffix.lower()
+    temp_path = SONGS_DIR / f".incoming_{uuid.uuid4().hex}"
+    try:
+        song_id = copy_and_hash(stream, temp_path)
+        existing = get_song(song_id)
+        if existing is not None and song_path(song_id, existing["suffix"]).exists():
+            return LibrarySong(
+                song_id=song_id,
+                filename=existing["filename"],
+                path=song_path(song_id, existing["suffix"]),
+                duplicate=True,
+            )
+        destination = song_path(song_id, suffix)
+        size = temp_path.stat().st_size
+        temp_path.replace(destination)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT INTO songs (song_id, filename, suffix, size, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(song_id) DO UPDATE SET
+                filename = excluded.filename,
+                suffix = excluded.suffix,
+                size = excluded.size
+            """,
+            (song_id, filename, suffix, size, time.time()),
+        )
+    return LibrarySong(song_id=song_id, filename=filename, path=destination)
+
+
+def set_song_analysis(
+    song_id: str,
+    state: str,
+    duration: Optional[float] = None,
+    tempo: Optional[float] = None,
+    beat_count: Optional[int] = None,
+    error: Optional[str] = None,
+) -> None:
+    with _connect() as conn:
+        conn.execute(
+            """
+            UPDATE songs SET
+                analysis_state = ?,
+                duration = COALESCE(?, duration),
+                tempo = COALESCE(?, tempo),
+                beat_count = COALESCE(?, beat_count),
+                error = ?
+            WHERE song_id = ?
+            """,
+            (state, duration, tempo, beat_count, error, song_id),
+        )
+
+
+def _song_item(row: sqlite3.Row) -> dict[str, Any]:
+    return {
+        "song_id": row["song_id"],
+        "filename": row["filename"],
+        "suffix": row["suffix"],
+        "size": row["size"],
+        "duration": row["duration"],
+        "tempo": row["tempo"],
+        "beat_count": row["beat_count"],
+        "analysis_state": row["analysis_state"],
+        "error": row["error"],
+    }
+
+
+def get_song(song_id: str) -> Optional[dict[str, Any]]:
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM songs WHERE song_id = ?", (song_id,)).fetchone()
+    return None if row is None else _song_item(row)
+
+
+def list_songs() -> list[dict[str, Any]]:
+    with _connect() as conn:
+        rows = conn.execute("SELECT * FROM songs ORDER BY created_at DESC").fetchall()
+    return [_song_item(row) for row in rows]
+
+
+def resolve_song(song_id: str) -> tuple[Path, dict[str, Any]]:
+    song = get_song(song_id)
+    if song is None:
+        raise FileNotFoundError(song_id)
+    path = song_path(song_id, song["suffix"])
+    if not path.is_file():
+        raise FileNotFoundError(song_id)
+    return path, song
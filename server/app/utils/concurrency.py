@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+_DONE = object()
+
+
+def cpu_count() -> int:
+    """Cores this process may use, capped by a worker's `CPU_BUDGET` when set."""
+    try:
+        available = max(1, len(os.sched_getaffinity(0)))
+    except (AttributeError, OSError):
+        available = max(1, os.cpu_count() or 1)
+    budget = env_int("CPU_BUDGET", available)
+    return max(1, min(available, budget))
+
+
+def env_int(name: str, default: int, minimum: int = 1) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return max(minimum, default)
+    try:
+        return max(minimum, int(raw))
+    except ValueError:
+        return max(minimum, default)
+
+
+def threads_per_worker(workers: int, total: Optional[int] = None) -> int:
+    total = total if total is not None else cpu_count()
+    return max(1, total // max(1, workers))
+
+
+def prefetch(
+    producers: Sequence[Callable[[], Iterable[T]]],
+    workers: int,
+    maxsize: int,
+) -> Iterator[T]:
+    """Run producers on background threads and yield their items as they arrive.
+
+    At most `workers` producers run at once and at most `maxsize` items wait in
+    the queue, so memory stays flat when the consumer is the bottleneck. Items
+    from one producer keep their order; different producers interleave. The
+    first producer error is raised in the consumer.
+    """
+    items: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def _put(entry: tuple[object, object]) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(producer: Callable[[], Iterable[T]]) -> None:
+        if stop.is_set():
+            return
+        iterator: Optional[Iterator[T]] = None
+        try:
+            iterator = iter(producer())
+            for item in iterator:
+                if not _put((None, item)):
+                    return
+        except BaseException as exc:
+            _put((exc, None))
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        _put((_DONE, None))
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prefetch")
+    for producer in producers:
+        pool.submit(_run, producer)
+    remaining = len(producers)
+    try:
+        while remaining:
+            marker, item = items.get()
+            if marker is _DONE:
+                remaining -= 1
+            elif marker is not None:
+                raise marker  # type: ignore[misc]
+            else:
+                yield item  # type: ignore[misc]
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Optional
+
+from app.utils.status import TERMINAL_STATUSES
+
+# Finished jobs are dropped from the hub after this long; status.json still has them.
+RETAIN_FINISHED_S = 600.0
+
+
+class StatusHub:
+    """In-memory job status for the API process, fanned out to stream subscribers.
+
+    Worker processes publish status and artifact events through a multiprocessing
+    queue; a drain thread feeds them into the hub, which keeps the latest status
+    per job and wakes every subscriber's asyncio queue on the API event loop.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latest: dict[str, dict[str, Any]] = {}
+        self._artifacts: dict[str, set[str]] = {}
+        self._finished: dict[str, float] = {}
+        self._pruned_at = time.monotonic()
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def live(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def latest(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            status = self._latest.get(job_id)
+            return dict(status) if status is not None else None
+
+    def artifacts(self, job_id: str) -> set[str]:
+        with self._lock:
+            return set(self._artifacts.get(job_id, set()))
+
+    def publish(self, event: dict[str, Any]) -> None:
+        job_id = event.get("job_id")
+        if not job_id:
+            return
+        with self._lock:
+            if event.get("type") == "artifact":
+                self._artifacts.setdefault(job_id, set()).add(str(event.get("name")))
+            else:
+                self._latest[job_id] = {key: value for key, value in event.items() if key != "type"}
+                if event.get("status") == "queued":
+                    # A new run; artifacts announced by the last one may be invalidated.
+                    self._artifacts.pop(job_id, None)
+                if event.get("status") in TERMINAL_STATUSES:
+                    self._finished[job_id] = time.monotonic()
+                else:
+                    self._finished.pop(job_id, None)
+            self._prune()
+            subscribers = list(self._subscribers.get(job_id, ()))
+            loop = self._loop
+        if loop is None:
+            return
+        for queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        if now - self._pruned_at < RETAIN_FINISHED_S / 10:
+            return
+        self._pruned_at = now
+        expired = [job_id for job_id, at in self._finished.items() if now - at > RETAIN_FINISHED_S]
+        for job_id in expired:
+            self._finished.pop(job_id, None)
+            self._latest.pop(job_id, None)
+            self._artifacts.pop(job_id, None)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    self._subscribers.pop(job_id, None)
+
+    def attach(self, source: Any, loop: asyncio.AbstractEventLoop) -> None:
+        """Drain `source` (a multiprocessing queue) until it yields None."""
+        self._loop = loop
+
+        def _drain() -> None:
+            while True:
+                try:
+                    event = source.get()
+                except (EOFError, OSError):
+                    return
+                if event is None:
+                    return
+                self.publish(event)
+
+        self._thread = threading.Thread(target=_drain, name="status-hub", daemon=True)
+        self._thread.start()
+
+
+HUB = StatusHub()
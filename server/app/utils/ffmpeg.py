@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import json
 import subprocess
+import tempfile
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+
+import numpy as np
 
 
 class FFmpegError(RuntimeError):
@@ -16,6 +19,42 @@ def run_ffmpeg(args: list[str]) -> None:
         raise FFmpegError(process.stderr.strip() or process.stdout.strip())
 
 
+def iter_raw_frames(
+    args: list[str],
+    width: int,
+    height: int,
+    channels: int = 3,
+) -> Iterator[np.ndarray]:
+    """Run ffmpeg writing rawvideo to stdout and yield (height, width, 3) frames.
+
+    `args` must end with `-f rawvideo -pix_fmt rgb24 pipe:1` (or `gray` with
+    `channels=1`, which yields (height, width) frames) and scale to exactly
+    width x height.
+    """
+    frame_bytes = width * height * channels
+    shape = (height, width, channels) if channels > 1 else (height, width)
+    # stderr goes to a file so a chatty ffmpeg can never block on a full pipe.
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=stderr)
+        assert process.stdout is not None
+        finished = False
+        try:
+            while True:
+                buffer = process.stdout.read(frame_bytes)
+                if len(buffer) < frame_bytes:
+                    break
+                yield np.frombuffer(buffer, dtype=np.uint8).reshape(shape)
+            finished = True
+        finally:
+            process.stdout.close()
+            if not finished:
+                process.kill()
+            process.wait()
+        if process.returncode != 0:
+            stderr.seek(0)
+            raise FFmpegError(stderr.read().decode(errors="replace").strip())
+
+
 def ffprobe_duration(path: Path) -> float:
     args = [
         "ffprobe",
@@ -35,3 +74,31 @@ def ffprobe_duration(path: Path) -> float:
     if duration is None:
         raise FFmpegError(f"Missing duration for {path}")
     return float(duration)
+
+
+def ffprobe_video_info(path: Path) -> dict[str, Any]:
+    args = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "stream=codec_name,width,height:format=duration",
+        "-of",
+        "json",
+        str(path),
+    ]
+    process = subprocess.run(args, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise FFmpegError(process.stderr.strip() or process.stdout.strip())
+    payload: dict[str, Any] = json.loads(process.stdout)
+    streams = payload.get("streams") or [{}]
+    stream = streams[0]
+    duration = payload.get("format", {}).get("duration")
+    return {
+        "duration": float(duration) if duration is not None else None,
+        "width": stream.get("width"),
+        "height": stream.get("height"),
+        "codec": stream.get("codec_name"),
+    }
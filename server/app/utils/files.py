@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import BinaryIO
+
+_HASH_CHUNK = 1024 * 1024
+_HASH_MEMO: dict[tuple[int, int, int, int], str] = {}
+_HASH_LOCK = threading.Lock()
+
+
+def _stat_key(path: Path) -> tuple[int, int, int, int]:
+    stat = path.stat()
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def file_sha256(path: Path) -> str:
+    key = _stat_key(path)
+    with _HASH_LOCK:
+        cached = _HASH_MEMO.get(key)
+    if cached is not None:
+        return cached
+
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    with _HASH_LOCK:
+        _HASH_MEMO[key] = value
+    return value
+
+
+def copy_and_hash(stream: BinaryIO, destination: Path) -> str:
+    """Copy `stream` into `destination` and return the SHA-256 of what was written."""
+    digest = hashlib.sha256()
+    with destination.open("wb") as handle:
+        for chunk in iter(lambda: stream.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+            handle.write(chunk)
+    value = digest.hexdigest()
+    with _HASH_LOCK:
+        _HASH_MEMO[_stat_key(destination)] = value
+    return value
+
+
+def _reflink(source: Path, destination: Path) -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - non-posix
+        return False
+    ficlone = 0x40049409
+    try:
+        with source.open("rb") as src, destination.open("wb") as dst:
+            fcntl.ioctl(dst.fileno(), ficlone, src.fileno())
+    except OSError:
+        destination.unlink(missing_ok=True)
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+def link_or_copy(source: Path, destination: Path) -> None:
+    """Hardlink `source` to `destination`, falling back to a reflink and then a copy."""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = destination.with_name(f".{destination.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        os.link(source, temp_path)
+    except OSError:
+        if not _reflink(source, temp_path):
+            shutil.copy2(source, temp_path)
+    temp_path.replace(destination)
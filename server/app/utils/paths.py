@@ -6,6 +6,7 @@ from pathlib import Path
 
 ROOT_DIR = Path(__file__).resolve().parents[2]
 JOBS_DIR = ROOT_DIR / "jobs"
+CACHE_DIR = ROOT_DIR / "cache"
 
 
 @dataclass(frozen=True)
@@ -18,6 +19,7 @@ class JobPaths:
     edl_path: Path
     status_path: Path
     job_path: Path
+    manifest_path: Path
 
 
 def get_job_paths(job_id: str) -> JobPaths:
@@ -31,6 +33,7 @@ def get_job_paths(job_id: str) -> JobPaths:
         edl_path=job_dir / "edl.json",
         status_path=job_dir / "status.json",
         job_path=job_dir / "job.json",
+        manifest_path=job_dir / "stages.json",
     )
 
 
@@ -1,24 +1,84 @@
 from __future__ import annotations
 
 import json
+import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Optional
+
+TERMINAL_STATUSES = {"complete", "error"}
+DISK_INTERVAL_S = 1.0
+
+_PUBLISHER: Optional[Callable[[dict[str, Any]], None]] = None
+_DISK_STATE: dict[Path, tuple[tuple[Any, Any], float]] = {}
+_DISK_LOCK = threading.Lock()
 
 
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def write_status(path: Path, data: dict[str, Any]) -> None:
+def _write_payload(path: Path, payload: dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    payload = {**data, "updated_at": utc_now_iso()}
     temp_path = path.with_suffix(".tmp")
     temp_path.write_text(json.dumps(payload, indent=2))
     temp_path.replace(path)
 
 
+def write_status(path: Path, data: dict[str, Any]) -> dict[str, Any]:
+    payload = {**data, "updated_at": utc_now_iso()}
+    _write_payload(path, payload)
+    return payload
+
+
 def read_status(path: Path) -> Optional[dict[str, Any]]:
     if not path.exists():
         return None
     return json.loads(path.read_text())
+
+
+def set_status_publisher(publisher: Optional[Callable[[dict[str, Any]], None]]) -> None:
+    global _PUBLISHER
+    _PUBLISHER = publisher
+
+
+def publish_event(event: dict[str, Any]) -> None:
+    publisher = _PUBLISHER
+    if publisher is None:
+        return
+    try:
+        publisher(event)
+    except Exception:
+        pass
+
+
+def report_status(path: Path, data: dict[str, Any]) -> dict[str, Any]:
+    """Push a status update to listeners and persist it.
+
+    With a live publisher the disk copy is only for durability: it is written on
+    step and state changes, for terminal states, and otherwise at most once per
+    DISK_INTERVAL_S.
+    """
+    payload = {**data, "updated_at": utc_now_iso()}
+    publish_event({"type": "status", **payload})
+
+    key = (payload.get("status"), payload.get("step"))
+    now = time.monotonic()
+    terminal = payload.get("status") in TERMINAL_STATUSES
+    with _DISK_LOCK:
+        previous = _DISK_STATE.get(path)
+        due = (
+            _PUBLISHER is None
+            or terminal
+            or previous is None
+            or previous[0] != key
+            or now - previous[1] >= DISK_INTERVAL_S
+        )
+        if terminal:
+            _DISK_STATE.pop(path, None)
+        elif due:
+            _DISK_STATE[path] = (key, now)
+    if due:
+        _write_payload(path, payload)
+    return payload
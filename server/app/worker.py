@@ -0,0 +1,250 @@
+"""Job worker pool.
+
+Workers pull tasks from the SQLite queue in `jobs/queue.sqlite` and run them in
+separate processes, so the API process only enqueues. Captioning goes through
+one shared inference service process (see `app.ai.service`). Start a standalone pool
+with `python -m app.worker`, or let the API start one (`JOB_WORKERS_EMBEDDED=1`).
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import secrets
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from app.pipeline import jobqueue
+from app.utils.concurrency import cpu_count, env_int, threads_per_worker
+from app.utils.status import set_status_publisher
+
+POLL_INTERVAL_S = 0.5
+SUPERVISE_INTERVAL_S = 2.0
+
+
+def _apply_limits(threads: int) -> None:
+    # Every pipeline stage sizes itself from cpu_count(), so the budget caps
+    # ffmpeg and torch threads for everything this worker runs.
+    os.environ["CPU_BUDGET"] = str(threads)
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.setdefault(name, str(threads))
+
+    nice = env_int("WORKER_NICE", 5, minimum=0)
+    if nice:
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+
+    max_memory_mb = env_int("WORKER_MAX_MEMORY_MB", 0, minimum=0)
+    if max_memory_mb:
+        try:
+            import resource
+
+            limit = max_memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass
+
+
+def _run_task(task: jobqueue.QueuedTask) -> None:
+    if task.kind == "render":
+        from app.pipeline.runner import run_saved_job
+
+        run_saved_job(task.task_id)
+    elif task.kind == "batch":
+        from app.pipeline.derive import run_batch
+
+        run_batch(task.task_id)
+    elif task.kind == "ingest":
+        from app.library import LibraryClip
+        from app.pipeline.ingest import preanalyze_clip
+
+        payload: dict[str, Any] = task.payload
+        preanalyze_clip(
+            LibraryClip(
+                name=payload["name"],
+                path=Path(payload["path"]),
+                content_hash=payload["content_hash"],
+            )
+        )
+    elif task.kind == "song":
+        from app.pipeline.ingest import analyze_library_song
+
+        analyze_library_song(task.payload["song_id"])
+    else:
+        raise ValueError(f"Unknown task kind: {task.kind}")
+
+
+def worker_main(
+    threads: int,
+    stop_event: Any,
+    events: Any = None,
+    inference: Optional[tuple[str, str]] = None,
+) -> None:
+    _apply_limits(threads)
+    if inference is not None:
+        os.environ["INFERENCE_ADDRESS"], os.environ["INFERENCE_AUTHKEY"] = inference
+    else:
+        from app.ai.fastvlm import warm_up, warmup_enabled
+
+        if warmup_enabled() and not os.getenv("INFERENCE_ADDRESS"):
+            # Without a shared service this worker captions itself.
+            threading.Thread(target=warm_up, name="model-warmup", daemon=True).start()
+    if events is not None:
+        set_status_publisher(events.put)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    pid = os.getpid()
+    while not stop_event.is_set():
+        task = jobqueue.claim(pid)
+        if task is None:
+            # Sleep rather than stop_event.wait(): a worker killed while waiting
+            # on the shared event leaves its condition waiting for it, and the
+            # pool's stop_event.set() would then hang.
+            time.sleep(POLL_INTERVAL_S)
+            continue
+        try:
+            _run_task(task)
+        except Exception as exc:
+            if task.kind in {"render", "batch"}:
+                from app.pipeline.runner import mark_job_failed
+
+                mark_job_failed(task.task_id, exc)
+            jobqueue.finish(task.task_id, error=str(exc) or exc.__class__.__name__)
+            continue
+        jobqueue.finish(task.task_id)
+
+
+def _fail_orphans(orphans: jobqueue.OrphanedTasks) -> None:
+    for task_id, kind in orphans.failed:
+        if kind in {"render", "batch"}:
+            from app.pipeline.runner import mark_job_failed
+
+            mark_job_failed(task_id, RuntimeError("Worker died repeatedly running this job"))
+
+
+class WorkerPool:
+    def __init__(self, workers: Optional[int] = None, publish_events: bool = False) -> None:
+        self.workers = workers or env_int("JOB_WORKERS", max(1, min(2, cpu_count() // 4)))
+        self.threads = env_int("WORKER_THREADS", threads_per_worker(self.workers))
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+        # Status and artifact events from every worker, for the API's status hub.
+        # Only created when something drains it; a standalone pool has no reader.
+        self.events = self._context.Queue() if publish_events else None
+        self._processes: list[multiprocessing.process.BaseProcess] = []
+        self._supervisor: Optional[threading.Thread] = None
+        self._service: Optional[multiprocessing.process.BaseProcess] = None
+        self.inference: Optional[tuple[str, str]] = None
+
+    def _start_inference_service(self) -> None:
+        from app.ai.service import default_address, service_enabled
+
+        if os.getenv("INFERENCE_ADDRESS") and os.getenv("INFERENCE_AUTHKEY"):
+            # An external service is configured; workers inherit its address.
+            return
+        if not service_enabled():
+            return
+        self.inference = (default_address(), secrets.token_hex(16))
+        self._service = self._spawn_service(self.inference)
+
+    def _spawn_service(self, inference: tuple[str, str]) -> multiprocessing.process.BaseProcess:
+        from app.ai.service import run_service
+
+        service = self._context.Process(
+            target=run_service,
+            args=(*inference, self._stop),
+            name="inference-service",
+            daemon=True,
+        )
+        service.start()
+        return service
+
+    def _spawn(self, index: int) -> multiprocessing.process.BaseProcess:
+        process = self._context.Process(
+            target=worker_main,
+            args=(self.threads, self._stop, self.events, self.inference),
+            name=f"job-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _supervise(self) -> None:
+        """Replace workers that died and release the tasks they held.
+
+        A dead inference service is restarted on the same address, so workers
+        reconnect to it within their retry window.
+        """
+        while not self._stop.wait(SUPERVISE_INTERVAL_S):
+            service = self._service
+            if service is not None and self.inference is not None and not service.is_alive():
+                if not self._stop.is_set():
+                    self._service = self._spawn_service(self.inference)
+            for index, process in enumerate(list(self._processes)):
+                # is_alive() also reaps the exited child, so its pid is free.
+                if process.is_alive() or self._stop.is_set():
+                    continue
+                if process.pid is not None:
+                    _fail_orphans(jobqueue.release_worker(process.pid))
+                self._processes[index] = self._spawn(index)
+
+    def start(self) -> None:
+        _fail_orphans(jobqueue.requeue_orphans())
+        self._start_inference_service()
+        for index in range(self.workers):
+            self._processes.append(self._spawn(index))
+        self._supervisor = threading.Thread(
+            target=self._supervise, name="worker-supervisor", daemon=True
+        )
+        self._supervisor.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._supervisor is not None:
+            self._supervisor.join(SUPERVISE_INTERVAL_S + 1.0)
+            self._supervisor = None
+        for process in self._processes:
+            process.join(timeout)
+        for process in self._processes:
+            if process.is_alive():
+                # Anything still running is requeued by the next pool start.
+                process.terminate()
+                process.join(1.0)
+        self._processes.clear()
+        if self._service is not None:
+            self._service.join(timeout)
+            if self._service.is_alive():
+                self._service.terminate()
+            self._service = None
+        if self.events is not None:
+            self.events.put(None)
+
+    def join(self) -> None:
+        for process in self._processes:
+            process.join()
+
+
+def main() -> None:
+    pool = WorkerPool()
+    pool.start()
+    print(f"Started {pool.workers} job workers ({pool.threads} threads each)", file=sys.stderr)
+
+    done = threading.Event()
+
+    def _shutdown(signum: int, frame: Any) -> None:
+        done.set()
+
+    signal.signal(signal.SIGINT, _shutdown)
+    signal.signal(signal.SIGTERM, _shutdown)
+    while not done.wait(1.0):
+        pass
+    pool.stop()
+
+
+if __name__ == "__main__":
+    main()
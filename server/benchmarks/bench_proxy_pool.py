@@ -0,0 +1,104 @@
+"""Serial vs parallel proxy generation on synthetic clips.
+
+Run from `server/`:
+
+    python -m benchmarks.bench_proxy_pool --clips 8 --seconds 6
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from app.pipeline.runner import ClipInput, preprocess_clips
+from app.utils.concurrency import cpu_count
+from app.utils.ffmpeg import run_ffmpeg
+from app.utils.paths import JobPaths
+
+
+def _make_clip(path: Path, seconds: float, index: int) -> None:
+    run_ffmpeg(
+        [
+            "ffmpeg",
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size=1920x1080:rate=30:duration={seconds}",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency={220 + index * 40}:duration={seconds}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-c:a",
+            "aac",
+            "-shortest",
+            str(path),
+        ]
+    )
+
+
+def _job_paths(root: Path) -> JobPaths:
+    paths = JobPaths(
+        job_dir=root,
+        input_dir=root / "input",
+        proxy_dir=root / "proxy",
+        frames_dir=root / "frames",
+        output_dir=root / "output",
+        edl_path=root / "edl.json",
+        status_path=root / "status.json",
+        job_path=root / "job.json",
+        manifest_path=root / "stages.json",
+    )
+    for path in [paths.input_dir, paths.proxy_dir]:
+        path.mkdir(parents=True, exist_ok=True)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clips", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=6.0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    # Both runs encode the same sources; keep the shared proxy cache out of it.
+    os.environ["PROXY_CACHE_MAX_MB"] = "0"
+
+    workers = args.workers or max(2, min(args.clips, cpu_count() // 2))
+    settings = {"resolution": "1080x1920"}
+
+    with tempfile.TemporaryDirectory(prefix="bench_proxy_") as tmp:
+        root = Path(tmp)
+        source_dir = root / "source"
+        source_dir.mkdir()
+        clips: list[ClipInput] = []
+        for index in range(1, args.clips + 1):
+            clip_path = source_dir / f"c{index}.mp4"
+            _make_clip(clip_path, args.seconds, index)
+            clips.append(ClipInput(clip_id=f"c{index}", path=clip_path, original_name=clip_path.name))
+
+        results: dict[str, tuple[float, list]] = {}
+        for label, count in [("serial", 1), ("parallel", workers)]:
+            paths = _job_paths(root / label)
+            started = time.perf_counter()
+            proxies = preprocess_clips(paths, clips, settings, max_workers=count)
+            results[label] = (time.perf_counter() - started, proxies)
+
+    serial_time, serial_proxies = results["serial"]
+    parallel_time, parallel_proxies = results["parallel"]
+    same_order = [p.clip_id for p in serial_proxies] == [p.clip_id for p in parallel_proxies]
+
+    print(f"cpus={cpu_count()} clips={args.clips} seconds={args.seconds} workers={workers}")
+    print(f"serial   {serial_time:8.2f}s")
+    print(f"parallel {parallel_time:8.2f}s  speedup x{serial_time / max(parallel_time, 1e-6):.2f}")
+    print(f"order preserved: {same_order}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Peak RSS and time of full vs streaming song analysis against track length.
+
+Run from `server/`:
+
+    python -m benchmarks.bench_song_stream --minutes 1 5 15 30 60
+
+Each run happens in a fresh process so its peak RSS is its own. Tracks are
+synthetic 44.1 kHz stereo WAVs with a click every half second over noise.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+SAMPLE_RATE = 44100
+
+_CHILD = """
+import json, resource, sys, time
+from pathlib import Path
+from app.audio import analysis
+mode, path = sys.argv[1], Path(sys.argv[2])
+import librosa, soundfile  # imported before the baseline so only the analysis counts
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+run = analysis._stream_analyze if mode == "stream" else analysis._decode_and_analyze
+started = time.perf_counter()
+result = run(path, "bench")
+elapsed = time.perf_counter() - started
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": elapsed, "baseline_kb": baseline, "peak_kb": peak,
+                  "tempo": result.tempo, "beats": len(result.beats)}))
+"""
+
+
+def _make_track(path: Path, minutes: float) -> None:
+    import soundfile
+
+    rng = np.random.default_rng(0)
+    click = np.hanning(256).astype(np.float32)
+    with soundfile.SoundFile(str(path), "w", SAMPLE_RATE, channels=2) as handle:
+        # Written a minute at a time so the generator itself stays small.
+        for _ in range(max(1, round(minutes))):
+            chunk = 0.05 * rng.standard_normal(60 * SAMPLE_RATE).astype(np.float32)
+            for start in range(0, len(chunk) - len(click), SAMPLE_RATE // 2):
+                chunk[start : start + len(click)] += click
+            handle.write(np.stack([chunk, chunk], axis=1))
+
+
+def _measure(mode: str, path: Path) -> dict[str, float]:
+    process = subprocess.run(
+        [sys.executable, "-c", _CHILD, mode, str(path)],
+        cwd=SERVER_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise SystemExit(process.stderr.strip().splitlines()[-1])
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 5, 15, 30])
+    args = parser.parse_args()
+
+    print(f"{'minutes':>8} {'mode':>7} {'peak MB':>9} {'delta MB':>9} {'seconds':>8} {'tempo':>7} {'beats':>6}")
+    with tempfile.TemporaryDirectory(prefix="bench_song_stream_") as tmp:
+        for minutes in args.minutes:
+            track = Path(tmp) / f"track_{minutes:g}.wav"
+            _make_track(track, minutes)
+            for mode in ("full", "stream"):
+                result = _measure(mode, track)
+                peak_mb = result["peak_kb"] / 1024
+                delta_mb = (result["peak_kb"] - result["baseline_kb"]) / 1024
+                print(
+                    f"{minutes:>8g} {mode:>7} {peak_mb:>9.1f} {delta_mb:>9.1f} "
+                    f"{result['seconds']:>8.2f} {result['tempo']:>7.1f} {result['beats']:>6}"
+                )
+            track.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""API startup cost: import time of `app.main` and time until /health answers.
+
+Run from `server/`:
+
+    python -m benchmarks.bench_startup --serve --record benchmarks/startup_history.jsonl
+
+`--record` appends one JSON line per run, so regressions show up over time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+IMPORT_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)")
+
+
+def _import_profile(module: str) -> tuple[float, list[tuple[str, float]]]:
+    """Wall time of a fresh `import module`, and the slowest packages it pulls in."""
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVER_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    if process.returncode != 0:
+        raise SystemExit(process.stderr.strip().splitlines()[-1])
+
+    packages: dict[str, float] = {}
+    for line in process.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        # A package's own root import carries the largest cumulative time.
+        package = match.group(2).split(".")[0]
+        packages[package] = max(packages.get(package, 0.0), int(match.group(1)) / 1e6)
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return wall, slowest
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _time_to_health(timeout: float = 60.0) -> float:
+    port = _free_port()
+    env = {**os.environ, "JOB_WORKERS_EMBEDDED": "0"}
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        cwd=SERVER_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=0.5):
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.05)
+        raise SystemExit("/health did not answer in time")
+    finally:
+        process.terminate()
+        process.wait(5)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--serve", action="store_true", help="also time uvicorn until /health answers")
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--record", type=Path, default=None)
+    args = parser.parse_args()
+
+    wall, slowest = _import_profile(args.module)
+    result: dict[str, Any] = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "import_s": round(wall, 3),
+        "slowest": {name: round(seconds, 3) for name, seconds in slowest[: args.top]},
+    }
+    print(f"import {args.module}: {wall:.2f}s")
+    for name, seconds in slowest[: args.top]:
+        print(f"  {name:<24} {seconds:6.3f}s")
+    for heavy in ("torch", "transformers", "librosa"):
+        if any(name == heavy for name, _ in slowest):
+            print(f"  warning: {heavy} is imported at startup")
+
+    if args.serve:
+        result["health_s"] = round(_time_to_health(), 3)
+        print(f"uvicorn -> /health: {result['health_s']:.2f}s")
+
+    if args.record:
+        args.record.parent.mkdir(parents=True, exist_ok=True)
+        with args.record.open("a") as handle:
+            handle.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Captioning throughput (frames/sec) against batch size on CPU.
+
+Run from `server/`:
+
+    python -m benchmarks.bench_vlm_batch --frames 32 --batch-sizes 1,2,4,8,16
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from app.utils.concurrency import cpu_count
+from app.utils.ffmpeg import run_ffmpeg
+
+
+def _make_frames(frames_dir: Path, count: int) -> list[Path]:
+    frames_dir.mkdir(parents=True, exist_ok=True)
+    run_ffmpeg(
+        [
+            "ffmpeg",
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size=720x1280:rate=1:duration={count}",
+            "-vf",
+            "scale=384:-1:flags=lanczos",
+            "-q:v",
+            "2",
+            str(frames_dir / "f_%04d.jpg"),
+        ]
+    )
+    return sorted(frames_dir.glob("f_*.jpg"))[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=32)
+    parser.add_argument("--batch-sizes", default="1,2,4,8,16")
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+    batch_sizes = [int(value) for value in args.batch_sizes.split(",") if value.strip()]
+
+    # Keep the model on CPU; the thread count is read when the model loads.
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    if args.threads:
+        os.environ["FASTVLM_THREADS"] = str(args.threads)
+
+    from app.ai import fastvlm
+
+    if fastvlm._load_model() is None:
+        raise SystemExit("torch/transformers are not installed; nothing to benchmark")
+
+    with tempfile.TemporaryDirectory(prefix="bench_vlm_") as tmp:
+        frames = _make_frames(Path(tmp), args.frames)
+        # Warm up weights and kernels so the first batch size is not penalized.
+        fastvlm.tag_frames(frames[:2], size=2)
+
+        print(f"cpus={cpu_count()} threads={fastvlm.torch_threads()} frames={len(frames)}")
+        baseline = None
+        for size in batch_sizes:
+            started = time.perf_counter()
+            labels = fastvlm.tag_frames(frames, size=size)
+            elapsed = time.perf_counter() - started
+            fps = len(labels) / max(elapsed, 1e-6)
+            baseline = baseline or fps
+            print(f"batch={size:<3d} {elapsed:8.2f}s  {fps:6.2f} frames/s  x{fps / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Float32 vs dynamic int8 captioning: latency per frame and label agreement.
+
+Run from `server/`:
+
+    python -m benchmarks.bench_vlm_quant --frames 24 --threads 4
+
+Pass `--frames-dir` with real footage frames (JPEGs) for a meaningful
+agreement number; synthetic test patterns only measure speed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.bench_vlm_batch import _make_frames
+
+
+def _run(frames: list[Path], quantize: str, size: int) -> tuple[float, list[dict[str, Any]]]:
+    from app.ai import fastvlm
+
+    os.environ["FASTVLM_QUANTIZE"] = quantize
+    fastvlm._MODEL = None
+    if fastvlm._load_model() is None:
+        raise SystemExit("torch/transformers are not installed; nothing to benchmark")
+    fastvlm.tag_frames(frames[:size], size=size)
+
+    started = time.perf_counter()
+    labels = fastvlm.tag_frames(frames, size=size)
+    return (time.perf_counter() - started) / max(1, len(frames)), labels
+
+
+def _agreement(reference: list[dict[str, Any]], candidate: list[dict[str, Any]]) -> dict[str, float]:
+    def jaccard(a: list[str], b: list[str]) -> float:
+        union = set(a) | set(b)
+        return len(set(a) & set(b)) / len(union) if union else 1.0
+
+    pairs = list(zip(reference, candidate))
+    return {
+        "caption_exact": statistics.mean(a["scene"] == b["scene"] for a, b in pairs),
+        "tags_jaccard": statistics.mean(jaccard(a["tags"], b["tags"]) for a, b in pairs),
+        "shot_type": statistics.mean(a["shot_type"] == b["shot_type"] for a, b in pairs),
+        "highlight_mae": statistics.mean(abs(a["highlight"] - b["highlight"]) for a, b in pairs),
+        "energy_mae": statistics.mean(abs(a["energy"] - b["energy"]) for a, b in pairs),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=24)
+    parser.add_argument("--frames-dir", type=Path, default=None)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    # Caption every frame in-process on CPU so both runs see identical work.
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    os.environ["FASTVLM_PREFILTER"] = "0"
+    os.environ.pop("INFERENCE_ADDRESS", None)
+    if args.threads:
+        os.environ["FASTVLM_THREADS"] = str(args.threads)
+
+    with tempfile.TemporaryDirectory(prefix="bench_vlm_quant_") as tmp:
+        if args.frames_dir:
+            frames = sorted(args.frames_dir.glob("*.jpg"))[: args.frames]
+        else:
+            frames = _make_frames(Path(tmp), args.frames)
+        float_latency, float_labels = _run(frames, "", args.batch_size)
+        int8_latency, int8_labels = _run(frames, "int8", args.batch_size)
+
+    print(f"frames={len(frames)} batch={args.batch_size}")
+    print(f"float32 {float_latency * 1000:8.1f} ms/frame")
+    print(f"int8    {int8_latency * 1000:8.1f} ms/frame  speedup x{float_latency / max(int8_latency, 1e-9):.2f}")
+    for name, value in _agreement(float_labels, int8_labels).items():
+        print(f"{name:<14} {value:.3f}")
+
+
+if __name__ == "__main__":
+    main()
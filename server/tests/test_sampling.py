@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.pipeline.sampling import MAX_GAP_S, SCAN_FPS, choose_sample_indices
+
+
+@pytest.mark.parametrize("seconds", [60, 300, 600, 3600])
+@pytest.mark.parametrize("pattern", ["uniform", "random", "burst"])
+def test_long_clips_stay_within_budget(seconds: int, pattern: str) -> None:
+    count = seconds * SCAN_FPS
+    if pattern == "uniform":
+        motion = np.full(count, 0.1, dtype=np.float32)
+    elif pattern == "random":
+        motion = np.random.default_rng(0).random(count).astype(np.float32)
+    else:
+        motion = np.where(np.arange(count) < count // 10, 1.0, 0.0).astype(np.float32)
+
+    indices = choose_sample_indices(motion, 120)
+
+    assert len(indices) <= 120
+    assert indices == sorted(set(indices))
+    assert 0 <= indices[0] and indices[-1] < count
+
+
+def test_gaps_are_split_when_the_budget_allows() -> None:
+    count = 300 * SCAN_FPS
+    motion = np.where(np.arange(count) < count // 10, 1.0, 0.0).astype(np.float32)
+
+    indices = choose_sample_indices(motion, 120)
+
+    max_gap = int(MAX_GAP_S * SCAN_FPS)
+    assert max(np.diff([-1, *indices])) <= max_gap
+    assert count - 1 - indices[-1] < max_gap